@@ -0,0 +1,48 @@
+"""Readable top contributors from per-feature logit contributions.
+
+The numbers come from FastModel.explain / score_frame(contributions=True):
+each feature's exact share of the logistic regression's logit, relative to a
+reference patient (training means for numeric features, the average over
+categories for categorical ones). exp(contribution) is the factor that
+feature multiplies the odds of disease by, compared with that reference.
+
+    attribution.top(contrib, d)     # -> [Contributor('Chest pain', 'Typical angina', 0.67, 1.95), ...]
+"""
+from collections import namedtuple
+from math import exp
+
+import numpy as np
+
+from scoring import FEATURES
+
+LABELS = {'age':'Age', 'sex':'Sex', 'cp':'Chest pain', 'trestbps':'Resting BP',
+          'chol':'Cholesterol', 'fbs':'Fasting sugar >120', 'restecg':'Resting ECG',
+          'thalach':'Max heart rate', 'exang':'Exercise angina', 'oldpeak':'ST depression',
+          'slope':'ST slope', 'ca':'Major vessels', 'thal':'Thalassemia'}
+# Same wording as the report's data cards
+CHOICES = {'sex':["Female","Male"],
+           'cp':["Typical Angina","Atypical Angina","Non-anginal Pain","Asymptomatic"],
+           'fbs':["No","Yes"], 'restecg':["Normal","ST-T Abnormality","LV Hypertrophy"],
+           'exang':["No","Yes"], 'slope':["Upsloping","Flat","Downsloping"],
+           'thal':["Normal","Fixed Defect","Reversible Defect","Unknown"]}
+UNITS  = {'age':" years", 'trestbps':" mm Hg", 'chol':" mg/dL", 'thalach':" bpm"}
+
+Contributor = namedtuple("Contributor", "label value logit odds")
+
+
+def value_text(feature, v):
+    if feature in CHOICES:
+        return CHOICES[feature][int(v)]
+    return f"{v:g}{UNITS.get(feature, '')}"
+
+
+# Largest |contribution| first; features that move the logit by less than
+# `min_abs` (odds x0.95-1.05) are left out
+def top(contrib, d, k=4, min_abs=0.05):
+    c = np.asarray(contrib, dtype=np.float64)
+    if c.shape != (len(FEATURES),):
+        return []
+    order = np.argsort(-np.abs(c), kind="stable")[:k]
+    return [Contributor(LABELS[FEATURES[j]], value_text(FEATURES[j], d[FEATURES[j]]),
+                        round(float(c[j]), 4), round(exp(c[j]), 3))
+            for j in order if abs(c[j]) >= min_abs]
@@ -0,0 +1,322 @@
+"""Append-only audit log of predictions (SQLite, WAL).
+
+One row per scored patient: time, patient ref, source, model version, the 13
+inputs, probability, prediction and risk band. `record` only puts the row on
+an in-memory queue and returns. A background writer thread drains the queue
+and commits everything waiting as one transaction (group commit), so a
+Predict click never waits on the disk and a burst of scores costs one fsync
+per batch rather than one per row. Triggers reject UPDATE and DELETE.
+
+Reads use their own connections (WAL lets them run alongside the writer) and
+page by keyset on (ts, id) through the time and patient-ref indexes. Every
+page costs the same however deep into a multi-million-row log it is.
+
+    log = audit_log.shared()          # heart_audit.db next to the model, HEART_AUDIT_DB overrides
+    log.record(d, prob, pred, risk, version="v1-a703ab8b", patient_ref="Patient 001", source="app")
+    page = log.query(patient_ref="Patient 001", since="2026-10-01", limit=100)
+    page = log.query(patient_ref="Patient 001", since="2026-10-01", limit=100, after=page.next)
+
+    python audit_log.py export --since 2026-10-01 --format csv --out audit.csv
+    python audit_log.py stats
+"""
+import argparse
+import atexit
+import csv
+import json
+import logging
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime, timezone
+
+from prediction_cache import feature_key
+from scoring import FEATURES, MODEL_PATH
+
+DB_PATH = os.environ.get("HEART_AUDIT_DB") or os.path.join(os.path.dirname(MODEL_PATH), "heart_audit.db")
+FORMAT  = 1                             # PRAGMA user_version
+REF     = "patient_ref"                 # optional column/field carrying the patient ref in CSVs and requests
+COLUMNS = ["id", "ts", "patient_ref", "source", "model_version"] + FEATURES + ["probability", "prediction", "risk"]
+
+Entry = namedtuple("Entry", COLUMNS)
+Page  = namedtuple("Page", "rows next")         # next: cursor for `after`, None on the last page
+
+# Every index also holds the rowid (id), so (ts) and (patient_ref, ts) serve
+# the (ts, id) keyset order without a sort.
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS audit (
+    id            INTEGER PRIMARY KEY,
+    ts            REAL NOT NULL,
+    patient_ref   TEXT,
+    source        TEXT,
+    model_version TEXT,
+    {", ".join(f"{c} REAL NOT NULL" for c in FEATURES)},
+    probability   REAL NOT NULL,
+    prediction    INTEGER NOT NULL,
+    risk          TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS audit_ts      ON audit(ts);
+CREATE INDEX IF NOT EXISTS audit_patient ON audit(patient_ref, ts);
+CREATE TRIGGER IF NOT EXISTS audit_no_update BEFORE UPDATE ON audit
+    BEGIN SELECT RAISE(ABORT, 'audit log is append-only'); END;
+CREATE TRIGGER IF NOT EXISTS audit_no_delete BEFORE DELETE ON audit
+    BEGIN SELECT RAISE(ABORT, 'audit log is append-only'); END;
+"""
+INSERT = f"INSERT INTO audit ({', '.join(COLUMNS[1:])}) VALUES ({', '.join('?' * (len(COLUMNS) - 1))})"
+
+_STOP = object()
+
+log = logging.getLogger(__name__)
+
+
+# None, epoch seconds, datetime/date or ISO string -> epoch seconds (naive = UTC)
+def epoch(t):
+    if t is None or isinstance(t, (int, float)):
+        return t
+    if isinstance(t, str):
+        t = datetime.fromisoformat(t)
+    elif not isinstance(t, datetime):
+        t = datetime(t.year, t.month, t.day)
+    return (t if t.tzinfo else t.replace(tzinfo=timezone.utc)).timestamp()
+
+
+def iso(ts):
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+
+def _connect(path, readonly=False):
+    if readonly:
+        con = sqlite3.connect(f"file:{path}?mode=ro", uri=True, timeout=30, check_same_thread=False)
+    else:
+        con = sqlite3.connect(path, timeout=30, isolation_level=None)
+        con.execute("PRAGMA journal_mode=WAL")
+        con.execute("PRAGMA synchronous=FULL")     # batches are rare enough to fsync each one
+    return con
+
+
+class AuditLog:
+    # batch: most rows per transaction; max_queue: pending items (a prediction
+    # or a whole batch) held before new ones are dropped and counted
+    def __init__(self, path=DB_PATH, batch=5000, max_queue=100000):
+        self.path  = path
+        self.batch = batch
+        self.q     = queue.Queue(maxsize=max_queue)
+        self.lock  = threading.Lock()
+        self.written = self.commits = self.failed = self.dropped = 0
+        self.closed  = False
+        con = _connect(path)                      # create on the caller, so a bad path fails here
+        try:
+            if con.execute("PRAGMA user_version").fetchone()[0] not in (0, FORMAT):
+                raise RuntimeError(f"{path}: unsupported audit log format")
+            con.executescript(SCHEMA)
+            con.execute(f"PRAGMA user_version={FORMAT}")
+        finally:
+            con.close()
+        self.thread = threading.Thread(target=self._loop, name="audit-writer", daemon=True)
+        self.thread.start()
+
+    # ── Writing ──────────────────────────────────────────────────────────────
+    def record(self, d, probability, prediction, risk, version=None, patient_ref=None, source=None, ts=None):
+        self._put([(time.time() if ts is None else ts, patient_ref or None, source,
+                    None if version is None else str(version), *feature_key(d),
+                    float(probability), int(prediction), str(risk))])
+
+    # Validated feature frame + its scored rows (probability/prediction/risk columns)
+    # as one queue item; refs: optional per-row patient refs
+    def record_frame(self, X, res, version=None, refs=None, source=None, ts=None):
+        ts, version = time.time() if ts is None else ts, None if version is None else str(version)
+        refs = [None] * len(X) if refs is None else [None if r is None or r != r or r == "" else str(r)
+                                                    for r in refs]
+        A    = X[FEATURES].to_numpy(dtype="float64").tolist()
+        self._put([(ts, ref, source, version, *a, float(p), int(y), str(r))
+                   for ref, a, p, y, r in zip(refs, A, res['probability'], res['prediction'], res['risk'])])
+
+    def _put(self, rows):
+        try:
+            if self.closed:
+                raise queue.Full
+            self.q.put_nowait(rows)
+        except queue.Full:
+            with self.lock:
+                self.dropped += len(rows)
+                first = self.dropped == len(rows)
+            if first:
+                log.warning("audit log %s: queue full or closed, dropping rows", self.path)
+
+    def _loop(self):
+        con = _connect(self.path)
+        while True:
+            items = [self.q.get()]
+            n     = len(items[0]) if items[0] is not _STOP else 0
+            while n < self.batch and items[-1] is not _STOP:
+                try:
+                    items.append(self.q.get_nowait())     # whatever queued up during the last commit
+                except queue.Empty:
+                    break
+                n += len(items[-1]) if items[-1] is not _STOP else 0
+            rows = [r for it in items if it is not _STOP for r in it]
+            if rows:
+                self._write(con, rows)
+            for _ in items:
+                self.q.task_done()
+            if items[-1] is _STOP:
+                con.close()
+                return
+
+    def _write(self, con, rows):
+        try:
+            con.execute("BEGIN")
+            con.executemany(INSERT, rows)
+            con.execute("COMMIT")
+            with self.lock:
+                self.written += len(rows)
+                self.commits += 1
+        except sqlite3.Error:
+            log.exception("audit log %s: failed to write %d row(s)", self.path, len(rows))
+            if con.in_transaction:
+                con.execute("ROLLBACK")
+            with self.lock:
+                self.failed += len(rows)
+
+    # Blocks until everything queued so far is committed
+    def flush(self):
+        self.q.join()
+
+    def close(self, timeout=10.0):
+        if self.closed:
+            return
+        self.closed = True
+        self.q.put(_STOP)
+        self.thread.join(timeout)
+
+    def stats(self):
+        with self.lock:
+            return {"path": self.path, "queued": self.q.qsize(), "written": self.written,
+                    "commits": self.commits, "failed": self.failed, "dropped": self.dropped}
+
+    # ── Reading ──────────────────────────────────────────────────────────────
+    # One page in (ts, id) order, oldest first (newest_first=True reverses it);
+    # pass the returned page.next as `after` to continue.
+    def query(self, patient_ref=None, since=None, until=None, after=None, limit=100, newest_first=False):
+        return query(self.path, patient_ref, since, until, after, limit, newest_first)
+
+    def rows(self, **filters):
+        return rows(self.path, **filters)
+
+    def count(self, **filters):
+        return count(self.path, **filters)
+
+
+def _where(patient_ref, since, until):
+    where, args = [], []
+    if patient_ref is not None:
+        where.append("patient_ref = ?"); args.append(patient_ref)
+    if since is not None:
+        where.append("ts >= ?"); args.append(epoch(since))
+    if until is not None:
+        where.append("ts < ?"); args.append(epoch(until))
+    return where, args
+
+
+def query(path=DB_PATH, patient_ref=None, since=None, until=None, after=None, limit=100, newest_first=False):
+    # The cursor replaces the bound on its side: SQLite seeks the index on one
+    # lower (or upper) bound, and `since` would make every page start from page 1
+    if after is not None:
+        since, until = (since, None) if newest_first else (None, until)
+    where, args = _where(patient_ref, since, until)
+    if after is not None:
+        where.append(f"(ts, id) {'<' if newest_first else '>'} (?, ?)"); args += list(after)
+    order = "DESC" if newest_first else "ASC"
+    sql   = (f"SELECT {', '.join(COLUMNS)} FROM audit {'WHERE ' + ' AND '.join(where) if where else ''} "
+             f"ORDER BY ts {order}, id {order} LIMIT ?")
+    con = _connect(path, readonly=True)
+    try:
+        out = [Entry(*r) for r in con.execute(sql, args + [int(limit)])]
+    finally:
+        con.close()
+    return Page(out, (out[-1].ts, out[-1].id) if len(out) == limit else None)
+
+
+# Every matching row, oldest first, fetched page by page
+def rows(path=DB_PATH, patient_ref=None, since=None, until=None, page=5000):
+    after = None
+    while True:
+        p = query(path, patient_ref, since, until, after, page)
+        yield from p.rows
+        if p.next is None:
+            return
+        after = p.next
+
+
+def count(path=DB_PATH, patient_ref=None, since=None, until=None):
+    where, args = _where(patient_ref, since, until)
+    con = _connect(path, readonly=True)
+    try:
+        return con.execute(f"SELECT COUNT(*) FROM audit {'WHERE ' + ' AND '.join(where) if where else ''}",
+                           args).fetchone()[0]
+    finally:
+        con.close()
+
+
+def export(out, fmt="csv", path=DB_PATH, **filters):
+    n = 0
+    if fmt == "csv":
+        w = csv.writer(out)
+        w.writerow(COLUMNS)
+        for e in rows(path, **filters):
+            w.writerow(e._replace(ts=iso(e.ts)))
+            n += 1
+    else:
+        for e in rows(path, **filters):
+            out.write(json.dumps(e._replace(ts=iso(e.ts))._asdict()) + "\n")
+            n += 1
+    return n
+
+
+_SHARED, _SHARED_LOCK = None, threading.Lock()
+
+def shared():
+    global _SHARED
+    if _SHARED is None:
+        with _SHARED_LOCK:
+            if _SHARED is None:
+                _SHARED = AuditLog()
+                atexit.register(_SHARED.close)     # commit what's queued on a clean exit
+    return _SHARED
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Query the prediction audit log")
+    ap.add_argument("--db", default=DB_PATH)
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    ex = sub.add_parser("export", help="write matching rows as CSV or JSON lines, oldest first")
+    ex.add_argument("--patient", help="only this patient ref")
+    ex.add_argument("--since", help="ISO date/time (UTC), inclusive")
+    ex.add_argument("--until", help="ISO date/time (UTC), exclusive")
+    ex.add_argument("--format", choices=["csv", "jsonl"], default="csv")
+    ex.add_argument("--out", help="output file (default: stdout)")
+    sub.add_parser("stats", help="row count and time range")
+    a = ap.parse_args(argv)
+
+    if not os.path.exists(a.db):
+        ap.error(f"no audit log at {a.db}")
+    if a.cmd == "export":
+        filters = dict(patient_ref=a.patient, since=a.since, until=a.until)
+        if a.out:
+            with open(a.out, "w", newline="") as f:
+                n = export(f, a.format, a.db, **filters)
+            print(f"{n:,} row(s) -> {a.out}", file=sys.stderr)
+        else:
+            export(sys.stdout, a.format, a.db, **filters)
+    else:
+        first, last = query(a.db, limit=1).rows, query(a.db, limit=1, newest_first=True).rows
+        print(json.dumps({"path": a.db, "rows": count(a.db),
+                          "first": iso(first[0].ts) if first else None,
+                          "last": iso(last[0].ts) if last else None}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
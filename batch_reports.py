@@ -0,0 +1,140 @@
+"""Render one PDF report per patient from a scored CSV, in parallel.
+
+Input is a CSV with the 13 feature columns and a `probability` column (the
+batch scoring download or stream_score output). Optional columns
+patient_name, patient_dob, clinician and notes fill the patient row of the
+report; prediction/risk are derived from the probability when absent. With
+contrib_<feature> columns (stream_score.py --contributions) each report also
+lists the model's top contributors. A report that fails to render is
+skipped and reported by CSV line; the others are still written, and the exit
+status is 1.
+
+    python batch_reports.py scored.csv --out-dir reports/
+    python batch_reports.py scored.csv --zip reports.zip --workers 8
+    python batch_reports.py scored.csv --zip - > reports.zip
+    python batch_reports.py scored.csv --zip reports.zip --metrics timings.json
+"""
+import argparse
+import os
+import re
+import sys
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import attribution
+import metrics
+import records
+import scoring
+from scoring import CONTRIB, FEATURES
+
+META = {"patient_name": "pname", "patient_dob": "pdob", "clinician": "pref", "notes": "notes"}
+
+
+def _fname(i, name):
+    stem = re.sub(r"[^A-Za-z0-9_.-]+", "_", str(name or "").strip())[:60].strip("_")
+    return f"HeartRisk_{i+1:05d}_{stem or 'Patient'}.pdf"
+
+
+# Worker: one task per patient — (row number, 27-byte record, patient/clinician strings).
+# Render time is measured here and returned, since workers' histograms stay in the worker.
+# A failing report comes back as its error text (pdf None) so the rest still render.
+def render(task):
+    from report import make_pdf_bytes
+    t0 = time.perf_counter()
+    i, raw, meta = task
+    rec = np.frombuffer(raw, dtype=records.RECORD)[0]
+    try:
+        pdf, err = make_pdf_bytes(**records.report_args(rec), **meta), None
+    except Exception as e:
+        pdf, err = None, f"{type(e).__name__}: {e}"
+    return i, _fname(i, meta["pname"]), pdf, err, time.perf_counter() - t0
+
+
+def load_tasks(path):
+    df = pd.read_csv(path)
+    missing = [c for c in FEATURES + ["probability"] if c not in df.columns]
+    if missing:
+        raise SystemExit(f"{path}: missing column(s) {', '.join(missing)}")
+    X, errs = scoring.validate(df)           # bounds must hold before narrowing to int8/int16
+    if errs:
+        raise SystemExit(f"{path}: " + "; ".join(errs))
+    try:
+        recs = records.from_frame(pd.concat([X, df.drop(columns=FEATURES)], axis=1))
+    except ValueError as e:
+        raise SystemExit(f"{path}: {e}")
+    meta = pd.DataFrame({v: (df[k].fillna("").astype(str) if k in df.columns else "")
+                         for k, v in META.items()}, index=df.index)
+    tasks = [(i, recs[i].tobytes(), m) for i, m in enumerate(meta.to_dict(orient="records"))]
+    if all(c in df.columns for c in CONTRIB):
+        C = df[CONTRIB].to_numpy(dtype=np.float64)
+        for i, _, m in tasks:
+            m["top"] = attribution.top(C[i], records.features(recs[i]))
+    return tasks
+
+
+# -> (written, failed [(CSV line, error)], seconds); failed rows are skipped
+def run(tasks, sink, workers=None, chunksize=8, progress=sys.stderr):
+    n, t0, done, failed = len(tasks), time.perf_counter(), 0, []
+    with ProcessPoolExecutor(max_workers=workers) as ex:
+        for i, name, pdf, err, seconds in ex.map(render, tasks, chunksize=chunksize):
+            if err is not None:
+                failed.append((i + 2, err))
+                if progress:
+                    print(f"\rCSV line {i + 2}: report failed, skipped ({err})", file=progress)
+            else:
+                metrics.observe("reports.render", seconds)
+                with metrics.span("reports.write"):
+                    sink(name, pdf)
+                done += 1
+            if progress and ((done + len(failed)) % 50 == 0 or done + len(failed) == n):
+                dt = time.perf_counter() - t0
+                print(f"\r{done}/{n} reports  {done/dt:6.1f} reports/s", end="", file=progress, flush=True)
+    dt = time.perf_counter() - t0
+    if progress:
+        print(file=progress)
+    return done, failed, dt
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Bulk PDF reports for a scored patient list")
+    ap.add_argument("csv")
+    out = ap.add_mutually_exclusive_group(required=True)
+    out.add_argument("--out-dir", help="write one PDF per patient into this directory")
+    out.add_argument("--zip", help="write all PDFs into one ZIP file ('-' for stdout)")
+    ap.add_argument("--workers", type=int, default=None, help="processes (default: CPU count)")
+    ap.add_argument("--chunksize", type=int, default=8)
+    ap.add_argument("--metrics", metavar="JSON", help="record per-stage timings and write them here")
+    a = ap.parse_args(argv)
+
+    if a.metrics:
+        metrics.enable()
+    with metrics.span("reports.load"):
+        tasks = load_tasks(a.csv)
+    if a.out_dir:
+        os.makedirs(a.out_dir, exist_ok=True)
+        def sink(name, pdf):
+            with open(os.path.join(a.out_dir, name), "wb") as f:
+                f.write(pdf)
+        done, failed, dt = run(tasks, sink, a.workers, a.chunksize)
+    else:
+        fh = sys.stdout.buffer if a.zip == "-" else open(a.zip, "wb")
+        with fh, zipfile.ZipFile(fh, "w", zipfile.ZIP_DEFLATED) as zf:
+            done, failed, dt = run(tasks, zf.writestr, a.workers, a.chunksize)
+    print(f"{done} reports in {dt:.1f}s — {done/max(dt, 1e-9):.1f} reports/sec "
+          f"({a.workers or os.cpu_count()} workers)", file=sys.stderr)
+    if a.metrics:
+        metrics.dump(a.metrics)
+    if failed:
+        lines = ", ".join(str(line) for line, _ in failed[:10])
+        print(f"{len(failed)} report(s) failed and were skipped (CSV line {lines}"
+              f"{', ...' if len(failed) > 10 else ''})", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
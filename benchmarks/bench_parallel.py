@@ -0,0 +1,72 @@
+"""Parallel batch scoring: throughput and speedup for 1..N worker processes.
+
+Pool start-up and the first call (buffer allocation) are excluded; each point
+is the best of --repeat calls on the same matrix.
+
+    python benchmarks/bench_parallel.py [--rows 2000000] [--max-workers 32] [--joblib]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import warnings
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+warnings.filterwarnings("ignore")
+
+import numpy as np
+import pandas as pd
+
+import scoring
+from parallel_score import ParallelScorer
+from scoring import FEATURES
+
+
+def best(fn, repeat):
+    ts = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fn()
+        ts.append(time.perf_counter() - t)
+    return min(ts)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    ap.add_argument("--rows", type=int, default=2_000_000)
+    ap.add_argument("--max-workers", type=int, default=os.cpu_count())
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--joblib", action="store_true", help="time the sklearn pipeline instead of the model store")
+    ap.add_argument("--json", help="also write the results to this file")
+    a = ap.parse_args(argv)
+
+    model = scoring.load_model() if a.joblib else scoring.get_model()
+    base  = pd.read_csv(os.path.join(ROOT, "heart.csv"))[FEATURES]
+    X     = base.iloc[np.random.default_rng(0).integers(0, len(base), a.rows)].reset_index(drop=True)
+    ref   = model.predict_proba(X)[:, 1]
+    t1    = best(lambda: model.predict_proba(X), a.repeat)
+    print(f"{a.rows:,} rows, {type(model).__name__}, {os.cpu_count()} CPUs")
+    print(f"{'in-process':>10}  {t1*1e3:9.1f} ms  {a.rows/t1:>13,.0f} rows/s")
+    print(f"{'workers':>10}  {'time':>12}  {'rows/s':>13}  {'speedup':>8}  {'efficiency':>10}")
+
+    out, w = [], 1
+    while w <= a.max_workers:
+        with ParallelScorer(model, workers=w) as ps:
+            got = ps.proba(X)                                   # warm: pool + buffers
+            if np.max(np.abs(got - ref)) > 1e-12:
+                raise SystemExit(f"{w} workers: results differ from in-process scoring")
+            t = best(lambda: ps.proba(X), a.repeat)
+        out.append({"workers": w, "seconds": t, "rows_per_s": a.rows / t, "speedup": t1 / t})
+        print(f"{w:>10}  {t*1e3:9.1f} ms  {a.rows/t:>13,.0f}  {t1/t:>7.2f}x  {t1/t/w:>9.0%}")
+        w = w * 2 if w * 2 <= a.max_workers or w == a.max_workers else a.max_workers
+    if a.json:
+        with open(a.json, "w") as f:
+            json.dump({"rows": a.rows, "model": type(model).__name__, "cpus": os.cpu_count(),
+                       "in_process_s": t1, "workers": out}, f, indent=2)
+        print(f"wrote {a.json}")
+
+
+if __name__ == "__main__":
+    main()
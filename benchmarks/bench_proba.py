@@ -0,0 +1,61 @@
+"""predict + predict_proba (old Predict handler) vs one predict_proba pass.
+
+Times the joblib sklearn pipeline, whose duplicate preprocessing pass this
+measures; --store times the model store's FastModel (what the app serves now).
+
+    python benchmarks/bench_proba.py [--store]
+"""
+import argparse
+import os
+import sys
+import time
+import warnings
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+warnings.filterwarnings("ignore")
+
+import numpy as np
+import pandas as pd
+
+import scoring
+from scoring import FEATURES
+
+
+def best_of(fn, repeat):
+    ts = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fn()
+        ts.append(time.perf_counter() - t)
+    return min(ts)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    ap.add_argument("--store", action="store_true", help="time the model store's FastModel instead of joblib")
+    a = ap.parse_args(argv)
+
+    model = scoring.get_model() if a.store else scoring.load_model()
+    print(f"model: {getattr(model, 'version', None) or 'joblib ' + os.path.basename(scoring.MODEL_PATH)}")
+    base  = pd.read_csv(os.path.join(ROOT, "heart.csv"))[FEATURES]
+
+    def two_pass(X):
+        pred = model.predict(X)
+        prob = model.predict_proba(X)[:, 1]
+        return pred, prob
+
+    def one_pass(X):
+        prob = model.predict_proba(X)[:, 1]
+        return scoring.classify(prob), prob
+
+    print(f"{'rows':>8}  {'predict+proba':>14}  {'proba only':>11}  {'saving':>7}")
+    for n, repeat in [(1, 200), (1000, 50), (100_000, 5)]:
+        X = pd.concat([base] * (n // len(base) + 1), ignore_index=True).iloc[:n]
+        assert np.array_equal(two_pass(X)[0], one_pass(X)[0])
+        t2, t1 = best_of(lambda: two_pass(X), repeat), best_of(lambda: one_pass(X), repeat)
+        print(f"{n:>8,}  {t2*1e3:>11.2f} ms  {t1*1e3:>8.2f} ms  {1 - t1/t2:>6.0%}")
+
+
+if __name__ == "__main__":
+    main()
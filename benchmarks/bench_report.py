@@ -0,0 +1,49 @@
+"""Per-report make_pdf_bytes render time and memory allocation.
+
+    python benchmarks/bench_report.py [-n 200]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from report import make_pdf_bytes
+from scoring import RECS, risk_factors
+
+D = {'age':63,'sex':1,'cp':0,'trestbps':145,'chol':263,'fbs':1,'restecg':0,
+     'thalach':132,'exang':1,'oldpeak':2.3,'slope':1,'ca':2,'thal':2}
+ARGS = dict(d=D, pred=1, prob=0.81, risk="HIGH", rec=RECS["HIGH"], rfs=risk_factors(D),
+            notes="Family history of CAD.\nOn statins.", pname="Patient 001",
+            pdob="1961-04-02", pref="Dr. Smith")
+
+
+def measure(n):
+    make_pdf_bytes(**ARGS)                          # warm imports / one-time setup
+    ts = []
+    for _ in range(n):
+        t = time.process_time()
+        make_pdf_bytes(**ARGS)
+        ts.append(time.process_time() - t)
+    tracemalloc.start()
+    make_pdf_bytes(**ARGS)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"mean_ms": statistics.mean(ts) * 1e3, "p50_ms": statistics.median(ts) * 1e3,
+            "peak_kib": peak / 1024}
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("-n", type=int, default=200)
+    r = measure(ap.parse_args().n)
+    print(f"render mean {r['mean_ms']:.2f} ms  p50 {r['p50_ms']:.2f} ms  "
+          f"peak {r['peak_kib']:.0f} KiB/report")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+"""Load test: simulated clinicians against the scoring path, the PDF path and the HTTP service.
+
+Each clinician is a thread replaying patients sampled from heart.csv. Age, BP,
+cholesterol, max heart rate and ST depression get a small jitter, so most
+patients are new to the prediction cache (--no-jitter replays rows as-is).
+Requests go back to back, or --think-ms apart. Threads are how one app
+instance serves its sessions, all in one process. Concurrency steps 1, 2,
+4, ... up to --max-clinicians. After --warmup, each level runs --duration
+seconds and reports throughput, p50/p95/p99/max latency, errors, and the
+peak RSS of this process and of the server.
+
+A level is saturated when throughput grows by less than --min-gain over the
+previous level, or p95 passes --slo-ms. The saturation point is the level
+before it: the most clinicians served before latency degrades. Stepping
+stops there unless --full.
+
+Targets:
+    score   prediction_cache.predict, as on Predict (the model store's FastModel)
+    pdf     predict + the app's background PDF pipeline (ReportJobs, 2 render workers)
+    http    POST /predict to server.py, started on a free port (or --url)
+
+    python benchmarks/loadtest.py                                   # all three targets
+    python benchmarks/loadtest.py score http --max-clinicians 128 --duration 5
+    python benchmarks/loadtest.py http --url http://127.0.0.1:8000 --think-ms 2000 --json load.json
+"""
+import argparse
+import json
+import os
+import resource
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+import warnings
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+warnings.filterwarnings("ignore")
+
+import numpy as np
+import pandas as pd
+
+import scoring
+from scoring import BOUNDS, FEATURES
+
+TARGETS = ["score", "pdf", "http"]
+JITTER  = {'age':2, 'trestbps':4, 'chol':10, 'thalach':5, 'oldpeak':0.2}
+_LO     = np.array([BOUNDS[c][0] for c in FEATURES], dtype=np.float64)
+_HI     = np.array([BOUNDS[c][1] for c in FEATURES], dtype=np.float64)
+_J      = np.array([JITTER.get(c, 0) for c in FEATURES], dtype=np.float64)
+
+
+# ── Patients ─────────────────────────────────────────────────────────────────
+def patients(A, rng, jitter=True):
+    while True:
+        a = A[rng.integers(len(A))]
+        if jitter:
+            a = np.clip(a + rng.uniform(-_J, _J), _LO, _HI)
+        yield {c: round(float(v), 1) if c == 'oldpeak' else int(round(v)) for c, v in zip(FEATURES, a)}
+
+
+# ── RSS ──────────────────────────────────────────────────────────────────────
+# Current resident set in MB from /proc; this process falls back to its peak
+# (getrusage) where /proc isn't available
+def rss_mb(pid=None):
+    try:
+        with open(f"/proc/{pid or 'self'}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    if pid is None:
+        r = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return r / (1024 * 1024 if sys.platform == "darwin" else 1024)
+    return None
+
+
+# ── Targets ──────────────────────────────────────────────────────────────────
+# Each returns (call(d), close(), {process name: pid}) for RSS sampling
+def target_score(a):
+    import prediction_cache
+    model, cache = scoring.get_model(), prediction_cache.PredictionCache()
+    return (lambda d: prediction_cache.predict(d, model, cache)), (lambda: None), {}
+
+
+def target_pdf(a):
+    import attribution
+    import prediction_cache
+    import records
+    from report import make_pdf_bytes, warm
+    from report_cache import ReportCache, report_key
+    from report_jobs import ReportJobs
+    warm()
+    model, cache = scoring.get_model(), prediction_cache.PredictionCache()
+    jobs = ReportJobs(ReportCache(max_entries=64, max_bytes=32 * 1024 * 1024), workers=2)   # as in the app
+    meta = dict(notes="", pname="Load test", pdob="", pref="")
+
+    def call(d):
+        p = prediction_cache.predict(d, model, cache)
+        R = records.report_args(records.one(d, p.probability, p.prediction, p.risk))
+        R["top"] = attribution.top(p.contributions, R["d"])
+        key = report_key(sorted(R["d"].items()), R["pred"], R["prob"], meta["notes"],
+                         meta["pname"], meta["pdob"], meta["pref"], tuple(R["top"]))
+        jobs.submit(key, lambda: make_pdf_bytes(**R, **meta)).result(timeout=120)
+    return call, (lambda: jobs.pool.shutdown(wait=False)), {}
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def target_http(a):
+    proc, url = None, a.url
+    if url is None:
+        port = _free_port()
+        proc = subprocess.Popen([sys.executable, os.path.join(ROOT, "server.py"), "--port", str(port)],
+                                cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        url  = f"http://127.0.0.1:{port}"
+        deadline = time.perf_counter() + 30
+        while True:
+            try:
+                urllib.request.urlopen(url + "/health", timeout=1).read()
+                break
+            except OSError:
+                if proc.poll() is not None or time.perf_counter() > deadline:
+                    proc.kill()
+                    raise SystemExit(f"server.py did not come up on {url}")
+                time.sleep(0.1)
+
+    def call(d):
+        req = urllib.request.Request(url + "/predict", json.dumps(d).encode("utf-8"),
+                                     {"Content-Type": "application/json"})
+        with urllib.request.urlopen(req, timeout=30) as r:
+            r.read()
+
+    def close():
+        if proc is not None:
+            proc.terminate()
+            proc.wait(10)
+    return call, close, ({"server": proc.pid} if proc is not None else {})
+
+
+# ── One concurrency level ────────────────────────────────────────────────────
+def run_level(call, n, A, a, pids):
+    stop, measuring = threading.Event(), threading.Event()
+    lat, errs = [[] for _ in range(n)], [0] * n
+    think = a.think_ms / 1000.0
+
+    def clinician(i):
+        gen = patients(A, np.random.default_rng(a.seed + i), not a.no_jitter)
+        while not stop.is_set():
+            d, t = next(gen), time.perf_counter()
+            try:
+                call(d)
+                ok = True
+            except Exception:
+                ok = False
+            if measuring.is_set():
+                if ok:
+                    lat[i].append(time.perf_counter() - t)
+                else:
+                    errs[i] += 1
+            if think:
+                stop.wait(think)
+
+    threads = [threading.Thread(target=clinician, args=(i,), daemon=True) for i in range(n)]
+    for t in threads:
+        t.start()
+    time.sleep(a.warmup)
+    measuring.set()
+    t0   = time.perf_counter()
+    peak = {"client": 0.0, **{k: 0.0 for k in pids}}
+    while time.perf_counter() - t0 < a.duration:
+        for k, pid in [("client", None), *pids.items()]:
+            peak[k] = max(peak[k], rss_mb(pid) or 0.0)
+        time.sleep(0.1)
+    measuring.clear()
+    elapsed = time.perf_counter() - t0
+    stop.set()
+    for t in threads:
+        t.join(60)
+
+    ms = np.array([x for l in lat for x in l]) * 1e3
+    pct = (lambda q: round(float(np.percentile(ms, q)), 2)) if len(ms) else (lambda q: None)
+    return {"clinicians": n, "requests": len(ms), "errors": sum(errs),
+            "req_per_s": round(len(ms) / elapsed, 1),
+            "p50_ms": pct(50), "p95_ms": pct(95), "p99_ms": pct(99),
+            "max_ms": round(float(ms.max()), 2) if len(ms) else None,
+            "rss_mb": {k: round(v, 1) for k, v in peak.items()}}
+
+
+def saturated(r, prev, a):
+    if r["requests"] == 0 or r["errors"] > 0.01 * (r["requests"] + r["errors"]):
+        return "errors"
+    if a.slo_ms and r["p95_ms"] > a.slo_ms:
+        return f"p95 over {a.slo_ms:g} ms"
+    if prev is not None and r["req_per_s"] < prev["req_per_s"] * (1 + a.min_gain):
+        return f"throughput {r['req_per_s'] / max(prev['req_per_s'], 1e-9) - 1:+.0%}"
+    return None
+
+
+def run_target(name, A, a):
+    call, close, pids = globals()[f"target_{name}"](a)
+    print(f"\n== {name}")
+    print(f"{'clinicians':>10}  {'req/s':>9}  {'p50 ms':>8}  {'p95 ms':>8}  {'p99 ms':>8}  {'max ms':>8}  "
+          f"{'errors':>6}  {'client MB':>9}" + "".join(f"  {k + ' MB':>9}" for k in pids))
+    levels, point, reason, n = [], None, None, 1
+    try:
+        while n <= a.max_clinicians:
+            r = run_level(call, n, A, a, pids)
+            levels.append(r)
+            f = lambda v: f"{v:8.2f}" if v is not None else f"{'—':>8}"
+            print(f"{n:>10}  {r['req_per_s']:>9,.1f}  {f(r['p50_ms'])}  {f(r['p95_ms'])}  {f(r['p99_ms'])}  "
+                  f"{f(r['max_ms'])}  {r['errors']:>6}  {r['rss_mb']['client']:>9.1f}"
+                  + "".join(f"  {r['rss_mb'][k]:>9.1f}" for k in pids))
+            why = saturated(r, levels[-2] if len(levels) > 1 else None, a)
+            if why and reason is None:
+                reason = why
+                point  = levels[-2] if len(levels) > 1 else None
+                if not a.full:
+                    break
+            n *= 2
+    finally:
+        close()
+    if reason is None:
+        print(f"not saturated up to {levels[-1]['clinicians']} clinician(s)")
+    elif point is None:
+        print(f"saturated at 1 clinician ({reason})")
+    else:
+        print(f"saturation point: {point['clinicians']} clinician(s), {point['req_per_s']:,.1f} req/s, "
+              f"p95 {point['p95_ms']} ms (next level: {reason})")
+    return {"levels": levels, "saturation": point and point["clinicians"], "reason": reason}
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    ap.add_argument("targets", nargs="*", metavar="target",
+                    help=f"any of {', '.join(TARGETS)} (default: all)")
+    ap.add_argument("--max-clinicians", type=int, default=64, help="highest concurrency level")
+    ap.add_argument("--duration", type=float, default=3.0, help="seconds measured per level")
+    ap.add_argument("--warmup", type=float, default=0.5, help="seconds run before measuring each level")
+    ap.add_argument("--think-ms", type=float, default=0.0, help="pause between one clinician's requests")
+    ap.add_argument("--min-gain", type=float, default=0.10,
+                    help="a level is saturated if throughput grows less than this over the previous one")
+    ap.add_argument("--slo-ms", type=float, help="... or if p95 latency goes over this")
+    ap.add_argument("--full", action="store_true", help="keep stepping past the saturation point")
+    ap.add_argument("--no-jitter", action="store_true", help="replay heart.csv rows unchanged")
+    ap.add_argument("--url", help="http: load this running server instead of starting server.py")
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--json", help="also write the results to this file")
+    a = ap.parse_args(argv)
+    if set(a.targets) - set(TARGETS):
+        ap.error(f"unknown target(s): {', '.join(sorted(set(a.targets) - set(TARGETS)))}")
+
+    A   = pd.read_csv(os.path.join(ROOT, "heart.csv"))[FEATURES].to_numpy(dtype=np.float64)
+    out = {}
+    print(f"{os.cpu_count()} CPUs, {a.duration:g}s per level, think {a.think_ms:g} ms, "
+          f"{'jittered' if not a.no_jitter else 'unchanged'} heart.csv patients")
+    for name in a.targets or TARGETS:
+        out[name] = run_target(name, A, a)
+    if a.json:
+        with open(a.json, "w") as f:
+            json.dump({"cpus": os.cpu_count(), "args": vars(a), "targets": out}, f, indent=2)
+        print(f"wrote {a.json}")
+
+
+if __name__ == "__main__":
+    main()
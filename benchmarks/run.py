@@ -0,0 +1,252 @@
+"""Benchmark suite: model load (cold process and warm) for the joblib pipeline
+and the model store, single-row latency (score() and the array-only
+score_one() that Predict and the service use) and batch throughput for both
+(sklearn pipeline and the store's FastModel, which the app and service serve),
+risk-factor evaluation and PDF render time.
+
+Workloads are heart.csv (1025 rows) plus synthetic enlargements (10k, 1M rows)
+sampled from it. Results are written as JSON and compared with a stored
+baseline; any timing more than --tolerance slower than baseline (TOLERANCE
+for the noisier cold-process loads, SUB_MS for sub-millisecond timings) is
+reported as a regression and the command exits non-zero. Gated timings are best-of-N, each sample looping the
+call long enough to swamp timer noise. The baseline is the per-metric median
+of --baseline-runs suite runs, and a metric over tolerance is measured again
+(--retries, a second apart, each in a fresh process) keeping its best, so a slow stretch on a shared
+machine doesn't fail the run while a real slowdown, which every measurement
+shows, still does. p50/p99 latencies come from a single pass and are
+reported, not gated.
+
+    python benchmarks/run.py                     # full suite, compare to baseline
+    python benchmarks/run.py --quick             # skip the 1M-row workload
+    python benchmarks/run.py --update-baseline   # record current numbers as baseline
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, HERE)
+warnings.filterwarnings("ignore")
+
+import numpy as np
+import pandas as pd
+
+import risk_rules
+import scoring
+from scoring import FEATURES
+
+RESULTS   = os.path.join(HERE, "results.json")
+BASELINE  = os.path.join(HERE, "baseline.json")
+TOLERANCE = {"model_load_cold": 0.5, "store_load_cold": 0.5}   # interpreter start-up varies
+SUB_MS    = 0.5        # tolerance for timings under 1 ms, which move with heap/cache state
+MIN_BATCH = 0.02                                                # seconds per timed sample
+
+
+# ── Workloads ────────────────────────────────────────────────────────────────
+def workloads(quick=False):
+    base = pd.read_csv(os.path.join(ROOT, "heart.csv"))[FEATURES]
+    rng  = np.random.default_rng(42)
+    out  = {"heart_1k": base}
+    for name, n in [("synth_10k", 10_000), ("synth_1m", 1_000_000)]:
+        if quick and n > 100_000:
+            continue
+        out[name] = base.iloc[rng.integers(0, len(base), n)].reset_index(drop=True)
+    return out
+
+
+# Best-of-`repeat` seconds per call; each sample runs fn enough times to take
+# MIN_BATCH (as timeit's autorange), so sub-millisecond calls aren't timer noise
+def timed(fn, repeat=5):
+    t = time.perf_counter()
+    fn()
+    once   = time.perf_counter() - t
+    number = max(1, int(MIN_BATCH / max(once, 1e-9)))
+    ts = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        for _ in range(number):
+            fn()
+        ts.append((time.perf_counter() - t) / number)
+    return min(ts)
+
+
+def percentiles(fn, n):
+    ts = np.empty(n)
+    for i in range(n):
+        t = time.perf_counter()
+        fn()
+        ts[i] = time.perf_counter() - t
+    return np.percentile(ts, 50), np.percentile(ts, 99)
+
+
+# ── Suite ────────────────────────────────────────────────────────────────────
+# `only`: measure just these metrics (re-measurements run in a fresh process)
+def run(quick=False, only=None):
+    m, r = {}, {}
+    want = lambda name: only is None or name in only
+
+    def put(name, seconds, unit="ms", **extra):
+        m[name] = {"value": round(seconds * (1e3 if unit == "ms" else 1e6), 4), "unit": unit, **extra}
+
+    def timing(name, fn, repeat, unit="ms", rate=False, **extra):
+        if want(name):
+            t = timed(fn, repeat)
+            put(name, t, unit, **extra, **({"rows_per_s": round(extra["rows"] / t)} if rate else {}))
+
+    cold = [sys.executable, "-W", "ignore", "-c", "import scoring; scoring.load_model()"]
+    timing("model_load_cold", lambda: subprocess.run(cold, cwd=ROOT, check=True), 3)
+    timing("model_load", lambda: scoring.load_model(), 20)
+    model = scoring.load_model()
+
+    import model_store
+    cold_store = [sys.executable, "-W", "ignore", "-c", "import model_store; model_store.load()"]
+    timing("store_load_cold", lambda: subprocess.run(cold_store, cwd=ROOT, check=True), 3)
+    timing("store_load", lambda: model_store.load(), 20)
+    fast = model_store.load()
+
+    rec = pd.read_csv(os.path.join(ROOT, "heart.csv"))[FEATURES].iloc[0].to_dict()
+    if only is None:                          # single pass each: reported, not gated
+        p50, p99 = percentiles(lambda: scoring.score(rec, model), 300)
+        put("single_row_p50", p50, "us", gated=False)
+        put("single_row_p99", p99, "us", gated=False)
+        p50, p99 = percentiles(lambda: scoring.score(rec, fast), 3000)
+        put("fast_single_row_p50", p50, "us", gated=False)
+        put("fast_single_row_p99", p99, "us", gated=False)
+    timing("single_row", lambda: scoring.score(rec, model), 5, "us")
+    timing("fast_single_row", lambda: scoring.score(rec, fast), 5, "us")
+    timing("score_one", lambda: scoring.score_one(rec, model), 5, "us")     # app/server single-patient path
+    timing("fast_score_one", lambda: scoring.score_one(rec, fast), 5, "us")
+
+    for name, X in workloads(quick).items():
+        n = len(X)
+        rep = 1 if n >= 1_000_000 else 5 if n >= 10_000 else 15
+        timing(f"batch_score_{name}", lambda: scoring.score_frame(X, model), rep, rate=True, rows=n)
+        timing(f"fast_batch_score_{name}", lambda: scoring.score_frame(X, fast), rep, rate=True, rows=n)
+        timing(f"risk_flags_{name}", lambda: risk_rules.evaluate(X), rep, rows=n)
+        timing(f"risk_messages_{name}", lambda: risk_rules.evaluate(X).joined(), rep, rows=n)
+
+    if want("pdf_render"):
+        from bench_report import ARGS, measure
+        from report import make_pdf_bytes
+        timing("pdf_render", lambda: make_pdf_bytes(**ARGS), 20, peak_kib=round(measure(1)["peak_kib"]))
+
+    import sklearn
+    r["env"] = {"python": platform.python_version(), "numpy": np.__version__,
+                "pandas": pd.__version__, "sklearn": sklearn.__version__,
+                "machine": platform.machine(), "cpus": os.cpu_count()}
+    r["timestamp"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+    r["metrics"]   = m
+    return r
+
+
+def tolerance_for(name, b, tolerance):
+    ms = b["value"] / (1e3 if b["unit"] == "us" else 1)
+    return TOLERANCE.get(name, max(tolerance, SUB_MS) if ms < 1 else tolerance)
+
+
+# All metrics are timings: lower is better. Returns the gated metrics over tolerance.
+def compare(cur, base, tolerance, names=None):
+    regressions = []
+    print(f"{'metric':<28} {'baseline':>12} {'current':>12} {'change':>8}")
+    for name, v in cur["metrics"].items():
+        if names is not None and name not in names:
+            continue
+        b = base["metrics"].get(name)
+        if b is None:
+            print(f"{name:<28} {'—':>12} {v['value']:>10.3f}{v['unit']:>2}")
+            continue
+        ch   = v["value"] / b["value"] - 1 if b["value"] else 0.0
+        flag = ""
+        if not v.get("gated", True):
+            flag = "  (not gated)"
+        elif ch > tolerance_for(name, b, tolerance):
+            flag = "  REGRESSION"
+            regressions.append(name)
+        print(f"{name:<28} {b['value']:>10.3f}{b['unit']:>2} {v['value']:>10.3f}{v['unit']:>2} {ch:>+7.0%}{flag}")
+    return regressions
+
+
+# Measure flagged metrics again in a fresh process (heap and cache state stick
+# within one), keeping the best; only what stays slow counts
+def confirm(cur, base, regressions, tolerance, retries):
+    for attempt in range(retries):
+        if not regressions:
+            break
+        time.sleep(1.0)
+        print(f"\nre-measuring {', '.join(regressions)} ({attempt + 1}/{retries})")
+        fd, tmp = tempfile.mkstemp(suffix=".json")
+        os.close(fd)
+        try:
+            subprocess.run([sys.executable, os.path.abspath(__file__), "--only", ",".join(regressions),
+                            "--out", tmp] + ([] if any("_1m" in n for n in regressions) else ["--quick"]),
+                           check=True, stdout=subprocess.DEVNULL)
+            with open(tmp) as f:
+                again = json.load(f)["metrics"]
+        finally:
+            os.remove(tmp)
+        for name in regressions:
+            v, t = cur["metrics"][name], again[name]["value"]
+            v["value"] = min(v["value"], t)
+            if "rows_per_s" in v:
+                v["rows_per_s"] = round(v["rows"] / v["value"] * 1e3)
+        regressions = compare(cur, base, tolerance, set(regressions))
+    return regressions
+
+
+def save(results, path):
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"wrote {path}")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    ap.add_argument("--quick", action="store_true", help="skip the 1M-row workload")
+    ap.add_argument("--out", default=RESULTS)
+    ap.add_argument("--baseline", default=BASELINE)
+    ap.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown (0.25 = 25%%)")
+    ap.add_argument("--retries", type=int, default=3, help="re-measurements before a slowdown counts")
+    ap.add_argument("--baseline-runs", type=int, default=3,
+                    help="--update-baseline: suite runs whose per-metric median is stored")
+    ap.add_argument("--update-baseline", action="store_true")
+    ap.add_argument("--only", help=argparse.SUPPRESS)           # comma-separated metrics; measure and write --out
+    a = ap.parse_args(argv)
+
+    cur = run(a.quick, set(a.only.split(",")) if a.only else None)
+    save(cur, a.out)
+    if a.only:
+        return 0
+    if a.update_baseline:
+        runs = [cur] + [run(a.quick) for _ in range(a.baseline_runs - 1)]
+        for name, v in cur["metrics"].items():
+            v["value"] = float(np.median([r["metrics"][name]["value"] for r in runs]))
+            if "rows_per_s" in v:
+                v["rows_per_s"] = round(v["rows"] / v["value"] * 1e3)
+        save(cur, a.baseline)
+        print(f"baseline updated: {a.baseline}")
+        return 0
+    if not os.path.exists(a.baseline):
+        print("no baseline yet — run with --update-baseline")
+        return 0
+    with open(a.baseline) as f:
+        base = json.load(f)
+    regressions = compare(cur, base, a.tolerance)
+    if regressions:
+        regressions = confirm(cur, base, regressions, a.tolerance, a.retries)
+        save(cur, a.out)                     # with the re-measured values
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond {a.tolerance:.0%}: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+"""Cold-start profile of the Streamlit app.
+
+Everything runs in fresh interpreters so nothing is already imported:
+
+  * import cost of each heavy dependency (cumulative, from `-X importtime`)
+  * time to first render: first script run of heart_Disease.py under AppTest
+  * background warm-up after first render: the active model-store version
+    (scoring.get_model) and the ReportLab imports and report assets (report.warm)
+  * first prediction + report once warm
+
+    python benchmarks/startup_profile.py [--json startup.json]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULES = ["streamlit", "pandas", "numpy", "pyarrow", "plotly.graph_objects",
+           "sklearn", "joblib", "reportlab.platypus"]
+
+# Executed in a fresh interpreter; prints one JSON line
+CHILD = r"""
+import json, sys, time, threading, warnings
+warnings.filterwarnings("ignore")
+t0 = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+t1 = time.perf_counter()
+at = AppTest.from_file("heart_Disease.py", default_timeout=60)
+at.run()
+t2 = time.perf_counter()
+warm = next((t for t in threading.enumerate() if t.name == "warm-up"), None)
+if warm is not None:
+    warm.join()
+t3 = time.perf_counter()
+import scoring, report, bench_report
+t = time.perf_counter()
+scoring.score(bench_report.D, scoring.get_model())
+report.make_pdf_bytes(**bench_report.ARGS)
+t4 = time.perf_counter()
+print(json.dumps({"import_streamlit_s": t1 - t0, "first_render_s": t2 - t1,
+                  "warm_up_s": t3 - t2, "first_predict_report_s": t4 - t,
+                  "exception": bool(at.exception)}))
+"""
+
+
+def import_times():
+    code = "import warnings; warnings.filterwarnings('ignore'); " + \
+           "; ".join(f"import {m}" for m in MODULES) + "; import scoring; scoring.load_model()"
+    err = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=ROOT,
+                         capture_output=True, text=True, check=True).stderr
+    cum = {}
+    for line in err.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, c, name = (s.strip() for s in line[12:].split("|"))
+        if c.isdigit() and name in MODULES:
+            cum[name] = int(c) / 1e6
+    return cum
+
+
+def startup():
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([ROOT, os.path.join(ROOT, "benchmarks")]))
+    out = subprocess.run([sys.executable, "-c", CHILD], cwd=ROOT, env=env,
+                         capture_output=True, text=True, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Cold-start profile of the Streamlit app")
+    ap.add_argument("--json", help="also write the results to this file")
+    a = ap.parse_args(argv)
+
+    imp, st = import_times(), startup()
+    print("import (cumulative, fresh process; shared deps counted once, first importer)")
+    for m in MODULES:
+        if m in imp:
+            print(f"  {m:<22} {imp[m]*1e3:8.0f} ms")
+    print("app")
+    for k in ["import_streamlit_s", "first_render_s", "warm_up_s", "first_predict_report_s"]:
+        print(f"  {k:<22} {st[k]*1e3:8.0f} ms")
+    if st["exception"]:
+        print("  (script raised — see AppTest output)")
+    if a.json:
+        with open(a.json, "w") as f:
+            json.dump({"imports_s": imp, "app": st}, f, indent=2)
+        print(f"wrote {a.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""Pure-NumPy fast path for the fitted scaler/one-hot/LogisticRegression pipeline.
+
+The sklearn Pipeline is flattened into a handful of arrays: the StandardScaler is
+folded into the numeric weights and every one-hot column becomes a
+(feature index, category value, weight) triple. A probability is then one
+matrix-vector product plus a sigmoid, with none of sklearn's validation or
+DataFrame column handling.
+
+Because the logit is a sum over design columns, it also splits exactly into
+per-feature contributions (`explain`), taken from the same matrix product as
+the probability.
+
+    python fastpath.py                 # export heart_disease_model.npz, verify, time
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+
+from scoring import FEATURES, MODEL_PATH
+
+NPZ_PATH = os.path.splitext(MODEL_PATH)[0] + ".npz"
+TOL      = 1e-9
+
+
+# ── Export ───────────────────────────────────────────────────────────────────
+def export_arrays(pipe):
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+    pre, clf = pipe.steps[0][1], pipe.steps[-1][1]
+    if len(pipe.steps) != 2 or not isinstance(clf, LogisticRegression) or clf.coef_.shape[0] != 1:
+        raise ValueError("expected Pipeline(preprocess, binary LogisticRegression)")
+    coef, pos = clf.coef_[0], 0
+    num_idx, num_w, num_mean = [], [], []
+    cat_idx, cat_val, cat_w   = [], [], []
+    for name, tr, cols in pre.transformers_:
+        if name == "remainder":
+            if tr != "drop":
+                raise ValueError("remainder columns are not supported")
+            continue
+        if isinstance(tr, StandardScaler):
+            mean  = tr.mean_  if tr.with_mean else np.zeros(len(cols))
+            scale = tr.scale_ if tr.with_std  else np.ones(len(cols))
+            w = coef[pos:pos + len(cols)]
+            num_idx += [FEATURES.index(c) for c in cols]
+            num_w   += list(w / scale)
+            num_mean+= list(mean)
+            pos += len(cols)
+        elif isinstance(tr, OneHotEncoder):
+            if tr.drop_idx_ is not None:
+                raise ValueError("OneHotEncoder(drop=...) is not supported")
+            for c, cats in zip(cols, tr.categories_):
+                cat_idx += [FEATURES.index(c)] * len(cats)
+                cat_val += list(cats.astype(np.float64))
+                cat_w   += list(coef[pos:pos + len(cats)])
+                pos += len(cats)
+        else:
+            raise ValueError(f"unsupported transformer {type(tr).__name__} for {cols}")
+    if pos != len(coef):
+        raise ValueError(f"transformed width {pos} != {len(coef)} coefficients")
+    num_w, num_mean = np.array(num_w), np.array(num_mean)
+    arrays = {"features": np.array(FEATURES),
+              "num_idx":  np.array(num_idx, dtype=np.intp),
+              "num_w":    num_w,
+              "num_mean": num_mean,
+              "cat_idx":  np.array(cat_idx, dtype=np.intp),
+              "cat_val":  np.array(cat_val),
+              "cat_w":    np.array(cat_w),
+              "bias":     np.array(clf.intercept_[0] - num_w @ num_mean)}
+    return {**arrays, **layout(arrays)}
+
+
+# Scoring layout derived from the weights. Exported with them so a memory-mapped
+# artifact is scored straight from its mapped pages: design-matrix gather order,
+# the weights in that order, the weights regrouped by owning feature (design
+# column x feature), and each feature's reference term: its training mean for
+# numeric features, the mean over categories for one-hot ones
+LAYOUT = ["gather", "w", "wf", "ref"]
+
+def layout(arrays):
+    num_idx, cat_idx = arrays["num_idx"], arrays["cat_idx"]
+    gather = np.concatenate([num_idx, cat_idx])
+    w      = np.concatenate([arrays["num_w"], arrays["cat_w"]])
+    wf     = np.zeros((len(gather), len(FEATURES)))
+    wf[np.arange(len(gather)), gather] = w
+    n_cats = np.bincount(cat_idx, minlength=len(FEATURES))
+    ref    = np.bincount(cat_idx, arrays["cat_w"], minlength=len(FEATURES)) / np.maximum(n_cats, 1)
+    ref[num_idx] += arrays["num_w"] * arrays["num_mean"]
+    return {"gather": gather, "w": w, "wf": wf, "ref": ref}
+
+
+def save(arrays, path=NPZ_PATH):
+    np.savez(path, **arrays)
+
+
+# ── Predictor ────────────────────────────────────────────────────────────────
+# Scores with the given arrays as-is (no copies), so memory-mapped ones stay
+# shared; the layout is computed only for artifacts saved without it
+class FastModel:
+    def __init__(self, arrays):
+        if list(arrays["features"]) != FEATURES:
+            raise ValueError(f"artifact features {list(arrays['features'])} != {FEATURES}")
+        if any(k not in arrays for k in LAYOUT):
+            arrays = {**arrays, **layout(arrays)}
+        self.arrays  = arrays
+        self.num_idx = arrays["num_idx"]
+        self.cat_idx = arrays["cat_idx"]
+        self.cat_val = arrays["cat_val"]
+        self.gather  = arrays["gather"]
+        self.w       = arrays["w"]
+        self.wf      = arrays["wf"]
+        self.ref     = arrays["ref"]
+        self.bias    = float(arrays["bias"])
+        self.nn      = len(self.num_idx)
+        self.base    = self.bias + float(self.ref.sum())        # logit of the reference patient
+
+    @classmethod
+    def load(cls, path=NPZ_PATH):
+        with np.load(path) as z:
+            return cls({k: z[k] for k in z.files})
+
+    @classmethod
+    def from_pipeline(cls, pipe):
+        return cls(export_arrays(pipe))
+
+    # Expanded design matrix: numeric columns as-is, one-hot columns as 0/1
+    def design(self, A):
+        Z = A[:, self.gather]
+        Z[:, self.nn:] = Z[:, self.nn:] == self.cat_val
+        return Z
+
+    def _matrix(self, X):
+        A = np.asarray(X[FEATURES] if hasattr(X, "columns") else X, dtype=np.float64)
+        return A[None, :] if A.ndim == 1 else A
+
+    def logit(self, X):
+        return self.design(self._matrix(X)) @ self.w + self.bias
+
+    # (logit, contributions): contributions[i, j] is feature j's share of row i's
+    # logit relative to the reference patient, so logit == base + row sum exactly.
+    # One design matrix and one matrix product for both.
+    def explain(self, X):
+        C = self.design(self._matrix(X)) @ self.wf
+        C -= self.ref
+        return C.sum(axis=1) + self.base, C
+
+    def predict_proba(self, X):
+        p = 1.0 / (1.0 + np.exp(-self.logit(X)))
+        return np.column_stack([1.0 - p, p])
+
+    def predict(self, X):
+        return (self.logit(X) > 0).astype(np.int64)
+
+    # Single patient: 13 values in FEATURES order -> P(disease)
+    def proba_one(self, values):
+        return 1.0 / (1.0 + np.exp(-(self.design(np.array([values], dtype=np.float64))[0] @ self.w
+                                     + self.bias)))
+
+
+def verify(fast, pipe, X, tol=TOL):
+    ref = pipe.predict_proba(X)[:, 1]
+    got = fast.predict_proba(X)[:, 1]
+    err = float(np.max(np.abs(ref - got)))
+    if err > tol:
+        raise AssertionError(f"fast path differs from sklearn by {err:.3e} (tol {tol:.0e})")
+    return err
+
+
+# ── CLI ──────────────────────────────────────────────────────────────────────
+def main(argv=None):
+    import pandas as pd
+    import scoring
+
+    ap = argparse.ArgumentParser(description="Export the joblib pipeline to NumPy arrays and verify it")
+    ap.add_argument("--model", default=MODEL_PATH)
+    ap.add_argument("--out",   default=NPZ_PATH)
+    ap.add_argument("--data",  default=os.path.join(os.path.dirname(MODEL_PATH), "heart.csv"))
+    a = ap.parse_args(argv)
+
+    pipe = scoring.load_model(a.model)
+    arr  = export_arrays(pipe)
+    save(arr, a.out)
+    fast = FastModel.load(a.out)
+    X    = pd.read_csv(a.data)[FEATURES]
+    print(f"exported {a.out}  ({len(fast.w)} weights)")
+    print(f"max |fast - sklearn| on {len(X)} rows: {verify(fast, pipe, X):.2e}")
+
+    row, n = X.iloc[0].to_numpy(dtype=np.float64), 20000
+    t = time.perf_counter()
+    for _ in range(n):
+        fast.proba_one(row)
+    t_fast = (time.perf_counter() - t) / n
+    one = X.iloc[:1]
+    t = time.perf_counter()
+    for _ in range(200):
+        pipe.predict_proba(one)
+    t_sk = (time.perf_counter() - t) / 200
+    print(f"single row: fast {t_fast*1e6:.1f} µs  vs sklearn {t_sk*1e6:.0f} µs  ({t_sk/t_fast:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
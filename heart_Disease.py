@@ -1,10 +1,26 @@
 import streamlit as st
-import pandas as pd
 import numpy as np
-import joblib
-import plotly.graph_objects as go
+import pandas as pd
+import os
+import re
+import threading
+import time
+import weakref
 from datetime import datetime, date
-import io
+import metrics
+import scoring
+import prediction_cache
+import records
+import attribution
+import audit_log
+import gauge
+import whatif
+from report import make_pdf_bytes
+from report_cache import ReportCache, report_key
+from report_jobs import ReportJobs
+from scoring import FEATURES, LOW_T, HIGH_T
+
+_t_run = time.perf_counter()          # "page.run" span (metrics.py, opt-in)
 
 # ── Page config ─────────────────────────────────────────────────────────────
 st.set_page_config(
@@ -14,8 +30,25 @@ st.set_page_config(
     initial_sidebar_state="collapsed"
 )
 
+# ── Partial reruns ──────────────────────────────────────────────────────────
+# Everything interactive lives in fragments: a widget inside one reruns only
+# that function, so the CSS and header below are sent on full runs (first
+# load, reconnect) and not on every click. Needs Streamlit >= 1.33; on older
+# versions a fragment is a plain call and every interaction reruns the page.
+fragment = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None) or (lambda f: f)
+
+# Static HTML/CSS with comments and whitespace stripped, once per process.
+# Spaces around CSS punctuation go only inside <style>; elsewhere whitespace
+# is just collapsed, so visible text keeps its spacing
+@st.cache_resource
+def compact(html):
+    html = re.sub(r"/\*.*?\*/", "", html, flags=re.S)
+    html = re.sub(r"\s+", " ", html)
+    return re.sub(r"<style>.*?</style>",
+                  lambda m: re.sub(r"\s*([{};,>])\s*", r"\1", m.group(0)), html, flags=re.S).strip()
+
 # ── CSS ─────────────────────────────────────────────────────────────────────
-st.markdown("""
+st.markdown(compact("""
 <style>
 /* ══ Animated background: 8-colour smooth cycle ══ */
 .stApp {
@@ -192,267 +225,82 @@ div[data-testid="column"] { padding:0 4px!important; }
 }
 hr { margin:4px 0!important; border-color:rgba(196,69,105,.12)!important; }
 </style>
-""", unsafe_allow_html=True)
+"""), unsafe_allow_html=True)
 
 # ── Model ────────────────────────────────────────────────────────────────────
-@st.cache_resource
+# Active version from the model store, loaded on first use (or by the warm-up
+# thread below), not before first paint. Errors are shown, never papered over.
 def load_model():
     try:
-        return joblib.load("heart_disease_model.joblib")
-    except:
+        return scoring.get_model()
+    except Exception as e:
+        st.error(f"Model unavailable — {e}")
+        return None
+
+# Shared across sessions; one pinned report per session, LRU-bounded overall
+@st.cache_resource
+def load_report_cache():
+    return ReportCache(max_entries=64, max_bytes=32 * 1024 * 1024)
+
+# Renders PDFs off the script thread; the page shows results first
+@st.cache_resource
+def load_report_jobs():
+    return ReportJobs(load_report_cache(), workers=2)
+
+# Append-only audit trail of every score (audit_log.py); rows are committed by a
+# background thread, so Predict doesn't wait on the disk
+@st.cache_resource
+def load_audit():
+    return audit_log.shared()
+
+def audit(write):
+    try:
+        write(load_audit())
+    except Exception as e:
+        st.warning(f"Audit log unavailable — {e}")
+
+# Streamlit has no session-end callback, so the first call in a session leaves
+# a token in its session state: once the runtime drops the session (closed, or
+# disconnected past its reconnect TTL) the token is collected and the session's
+# pinned report is released
+class _SessionToken:
+    pass
+
+def session_id():
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+    ctx = get_script_run_ctx()
+    if ctx is None:
         return None
+    if "_report_pin" not in st.session_state:
+        tok = _SessionToken()
+        weakref.finalize(tok, load_report_cache().evict_session, ctx.session_id)
+        st.session_state["_report_pin"] = tok
+    return ctx.session_id
 
-model = load_model()
-
-# ── PDF generator using ReportLab (true .pdf, no HTML) ──────────────────────
-def make_pdf_bytes(d, pred, prob, risk, rec, rfs, notes, pname, pdob, pref):
-    from reportlab.lib.pagesizes import A4
-    from reportlab.lib import colors
-    from reportlab.lib.units import mm
-    from reportlab.lib.styles import ParagraphStyle
-    from reportlab.lib.enums import TA_LEFT, TA_CENTER, TA_RIGHT
-    from reportlab.platypus import (SimpleDocTemplate, Paragraph, Spacer,
-                                     Table, TableStyle, HRFlowable)
-    from reportlab.graphics.shapes import Rect, String, Drawing
-
-    buf = io.BytesIO()
-    doc = SimpleDocTemplate(buf, pagesize=A4,
-                             leftMargin=15*mm, rightMargin=15*mm,
-                             topMargin=12*mm, bottomMargin=12*mm)
-
-    PINK   = colors.HexColor("#C44569")
-    LPINK  = colors.HexColor("#FF6B9D")
-    RC     = {"LOW":colors.HexColor("#27AE60"),
-               "MEDIUM":colors.HexColor("#F39C12"),
-               "HIGH":colors.HexColor("#E74C3C")}[risk]
-    RBG    = {"LOW":colors.HexColor("#EAFAF1"),
-               "MEDIUM":colors.HexColor("#FEF9E7"),
-               "HIGH":colors.HexColor("#FDEDEC")}[risk]
-    GREY   = colors.HexColor("#888888")
-    CARD   = colors.HexColor("#FAFAFA")
-    BORD   = colors.HexColor("#EEEEEE")
-
-    def P(text, size=9, color=colors.HexColor("#222222"), bold=False,
-          align=TA_LEFT, leading=None):
-        fn = "Helvetica-Bold" if bold else "Helvetica"
-        return Paragraph(str(text), ParagraphStyle("p",
-            fontSize=size, textColor=color, fontName=fn,
-            alignment=align, leading=leading or size*1.35))
-
-    W = A4[0] - 30*mm
-    story = []
-
-    # ── HEADER ──
-    hdr = Table([[
-        P("❤️  Heart Disease Risk Assessment Report", 15, colors.white, True),
-        P(f"ID: HDR-{datetime.now().strftime('%Y%m%d%H%M%S')}<br/>"
-          f"{datetime.now().strftime('%d %B %Y, %H:%M')}<br/>"
-          "EDUCATIONAL USE ONLY", 7.5, colors.white, align=TA_RIGHT)
-    ],[
-        P("Logistic Regression · ROC-AUC: 0.9058 · UCI Heart Disease Dataset",
-          8, colors.white),
-        ""
-    ]], colWidths=[W*0.65, W*0.35])
-    hdr.setStyle(TableStyle([
-        ("BACKGROUND",   (0,0),(-1,-1), PINK),
-        ("VALIGN",       (0,0),(-1,-1), "MIDDLE"),
-        ("TOPPADDING",   (0,0),(-1,-1), 9),
-        ("BOTTOMPADDING",(0,0),(-1,-1), 7),
-        ("LEFTPADDING",  (0,0),(-1,-1), 10),
-        ("RIGHTPADDING", (0,0),(-1,-1), 10),
-        ("SPAN",         (0,0),(0,1)),
-    ]))
-    story += [hdr, Spacer(1, 4*mm)]
-
-    # ── DISCLAIMER ──
-    disc = Table([[P("⚠  DISCLAIMER: This is an educational ML tool only. It does not "
-                     "constitute medical advice, diagnosis, or treatment. Always consult "
-                     "a qualified healthcare professional.", 8,
-                     colors.HexColor("#856404"))]], colWidths=[W])
-    disc.setStyle(TableStyle([
-        ("BACKGROUND",   (0,0),(-1,-1), colors.HexColor("#FFF3CD")),
-        ("BOX",          (0,0),(-1,-1), 0.5, colors.HexColor("#FFEEBA")),
-        ("LEFTPADDING",  (0,0),(-1,-1), 8),
-        ("RIGHTPADDING", (0,0),(-1,-1), 8),
-        ("TOPPADDING",   (0,0),(-1,-1), 5),
-        ("BOTTOMPADDING",(0,0),(-1,-1), 5),
-    ]))
-    story += [disc, Spacer(1, 3*mm)]
-
-    # ── PATIENT ROW ──
-    pt_parts = []
-    if pname: pt_parts.append(f"<b>Patient:</b> {pname}")
-    if pdob:  pt_parts.append(f"<b>DOB:</b> {pdob}")
-    if pref:  pt_parts.append(f"<b>Clinician:</b> {pref}")
-    if pt_parts:
-        pt = Table([[P("  |  ".join(pt_parts), 9,
-                       colors.HexColor("#333333"))]], colWidths=[W])
-        pt.setStyle(TableStyle([
-            ("BACKGROUND",   (0,0),(-1,-1), colors.HexColor("#F0F4FF")),
-            ("BOX",          (0,0),(-1,-1), 0.5, colors.HexColor("#C7D2FE")),
-            ("LEFTPADDING",  (0,0),(-1,-1), 8),
-            ("TOPPADDING",   (0,0),(-1,-1), 4),
-            ("BOTTOMPADDING",(0,0),(-1,-1), 4),
-        ]))
-        story += [pt, Spacer(1, 3*mm)]
-
-    # ── RISK BANNER ──
-    ri = {"LOW":"✓","MEDIUM":"!","HIGH":"⚠"}[risk]
-    rb = Table([[
-        P(ri, 16, colors.white, True, TA_CENTER),
-        [P(f"{risk} RISK", 14, RC, True),
-         P(f"Disease probability: <b>{prob*100:.1f}%</b>  |  "
-           f"{'Heart Disease Detected' if pred==1 else 'No Heart Disease Detected'}",
-           9, colors.HexColor("#555555"))],
-        [P("📋  RECOMMENDATION", 8, RC, True),
-         Spacer(1, 2),
-         P(rec, 9, colors.HexColor("#444444"))]
-    ]], colWidths=[11*mm, W*0.53, W*0.35])
-    rb.setStyle(TableStyle([
-        ("BACKGROUND",   (0,0),(-1,-1), RBG),
-        ("BOX",          (0,0),(-1,-1), 1.0, RC),
-        ("BACKGROUND",   (0,0),(0,0),   RC),
-        ("VALIGN",       (0,0),(-1,-1), "MIDDLE"),
-        ("LINEAFTER",    (1,0),(1,0),   0.5, RC),
-        ("LEFTPADDING",  (0,0),(-1,-1), 8),
-        ("RIGHTPADDING", (0,0),(-1,-1), 8),
-        ("TOPPADDING",   (0,0),(-1,-1), 8),
-        ("BOTTOMPADDING",(0,0),(-1,-1), 8),
-    ]))
-    story += [rb, Spacer(1, 3*mm)]
-
-    # ── GAUGE ──
-    story.append(P("RISK PROBABILITY GAUGE", 7, GREY, True))
-    story.append(Spacer(1, 1*mm))
-    gw, gh = W, 10
-    g = Drawing(gw, gh + 14)
-    g.add(Rect(0,    14, gw*0.30, gh, fillColor=colors.HexColor("#27AE60"), strokeColor=None))
-    g.add(Rect(gw*0.30, 14, gw*0.40, gh, fillColor=colors.HexColor("#F39C12"), strokeColor=None))
-    g.add(Rect(gw*0.70, 14, gw*0.30, gh, fillColor=colors.HexColor("#E74C3C"), strokeColor=None))
-    nx = gw * min(max(prob, 0.01), 0.99)
-    g.add(Rect(nx-1.5, 11, 3, gh+5, fillColor=colors.HexColor("#1a1a1a"), strokeColor=None))
-    for pct, lbl in [(0,"0%"),(0.25,"25%"),(0.50,"50%"),(0.75,"75%"),(1.0,"100%")]:
-        g.add(String(gw*pct, 2, lbl, fontSize=7, fillColor=colors.HexColor("#999999"),
-                     textAnchor="middle"))
-    story += [g, Spacer(1, 3*mm)]
-
-    # ── DATA CARDS helper ──
-    def card(title, rows):
-        inner = Table([[P(k, 9, GREY), P(v, 9, colors.HexColor("#222"), True)]
-                        for k,v in rows], colWidths=[W*0.22, W*0.25])
-        inner.setStyle(TableStyle([
-            ("LINEBELOW",    (0,0),(-1,-2), 0.3, colors.HexColor("#F0F0F0")),
-            ("TOPPADDING",   (0,0),(-1,-1), 2),
-            ("BOTTOMPADDING",(0,0),(-1,-1), 2),
-            ("LEFTPADDING",  (0,0),(-1,-1), 0),
-            ("RIGHTPADDING", (0,0),(-1,-1), 0),
-        ]))
-        outer = Table([[P(title, 8, PINK, True)],[inner]], colWidths=[None])
-        outer.setStyle(TableStyle([
-            ("BACKGROUND",   (0,0),(-1,-1), CARD),
-            ("BOX",          (0,0),(-1,-1), 0.5, BORD),
-            ("LINEBELOW",    (0,0),(0,0),   0.5, colors.HexColor("#F0E0E5")),
-            ("LEFTPADDING",  (0,0),(-1,-1), 8),
-            ("RIGHTPADDING", (0,0),(-1,-1), 8),
-            ("TOPPADDING",   (0,0),(-1,-1), 5),
-            ("BOTTOMPADDING",(0,0),(-1,-1), 5),
-        ]))
-        return outer
-
-    sex_s = "Male" if d["sex"]==1 else "Female"
-    cp_s  = ["Typical Angina","Atypical Angina","Non-anginal Pain","Asymptomatic"][d["cp"]]
-    ecg_s = ["Normal","ST-T Abnormality","LV Hypertrophy"][d["restecg"]]
-    sl_s  = ["Upsloping","Flat","Downsloping"][d["slope"]]
-    th_s  = ["Normal","Fixed Defect","Reversible Defect","Unknown"][d["thal"]]
-    fbs_s = "Yes" if d["fbs"]==1 else "No"
-    ex_s  = "Yes" if d["exang"]==1 else "No"
-    cw = (W - 4*mm) / 2
-
-    row1 = Table([[
-        card("👤  DEMOGRAPHICS & VITALS", [
-            ("Age",f"{d['age']} years"),("Sex",sex_s),
-            ("Resting BP",f"{d['trestbps']} mm Hg"),
-            ("Cholesterol",f"{d['chol']} mg/dL"),
-            ("Max Heart Rate",f"{d['thalach']} bpm")]),
-        card("🏥  BLOOD & ECG", [
-            ("Fasting Sugar >120",fbs_s),("Resting ECG",ecg_s),
-            ("ST Depression",str(d['oldpeak'])),("ST Slope",sl_s)])
-    ]], colWidths=[cw, cw])
-    row1.setStyle(TableStyle([
-        ("LEFTPADDING",(0,0),(-1,-1),2),("RIGHTPADDING",(0,0),(-1,-1),2),
-        ("VALIGN",(0,0),(-1,-1),"TOP")]))
-    story += [row1, Spacer(1, 2*mm)]
-
-    rf_items = ([P(f"⚠  {r}", 9, colors.HexColor("#333")) for r in rfs]
-                if rfs else [P("✓  No major risk factors identified", 9,
-                               colors.HexColor("#27AE60"), True)])
-    rf_inner = Table([[item] for item in rf_items], colWidths=[None])
-    rf_inner.setStyle(TableStyle([
-        ("TOPPADDING",(0,0),(-1,-1),1),("BOTTOMPADDING",(0,0),(-1,-1),1),
-        ("LEFTPADDING",(0,0),(-1,-1),0)]))
-    rf_card = Table([
-        [P("⚠️  RISK FACTORS IDENTIFIED", 8, PINK, True)],
-        [rf_inner]
-    ], colWidths=[None])
-    rf_card.setStyle(TableStyle([
-        ("BACKGROUND",(0,0),(-1,-1),CARD),("BOX",(0,0),(-1,-1),0.5,BORD),
-        ("LINEBELOW",(0,0),(0,0),0.5,colors.HexColor("#F0E0E5")),
-        ("LEFTPADDING",(0,0),(-1,-1),8),("RIGHTPADDING",(0,0),(-1,-1),8),
-        ("TOPPADDING",(0,0),(-1,-1),5),("BOTTOMPADDING",(0,0),(-1,-1),5)]))
-
-    row2 = Table([[
-        card("💊  CLINICAL FINDINGS", [
-            ("Chest Pain",cp_s),("Exercise Angina",ex_s),
-            ("Major Vessels",str(d['ca'])),("Thalassemia",th_s)]),
-        rf_card
-    ]], colWidths=[cw, cw])
-    row2.setStyle(TableStyle([
-        ("LEFTPADDING",(0,0),(-1,-1),2),("RIGHTPADDING",(0,0),(-1,-1),2),
-        ("VALIGN",(0,0),(-1,-1),"TOP")]))
-    story.append(row2)
-
-    # ── CLINICIAN NOTES ──
-    if notes.strip():
-        story.append(Spacer(1, 3*mm))
-        nt = Table([
-            [P("📝  CLINICIAN NOTES", 8, colors.HexColor("#E67E22"), True)],
-            [P(notes.replace('\n','<br/>'), 9, colors.HexColor("#444444"), leading=13)]
-        ], colWidths=[W])
-        nt.setStyle(TableStyle([
-            ("BACKGROUND",(0,0),(-1,-1),colors.HexColor("#FFF8E7")),
-            ("BOX",(0,0),(-1,-1),0.8,colors.HexColor("#F39C12")),
-            ("LINEBELOW",(0,0),(0,0),0.5,colors.HexColor("#F39C12")),
-            ("LEFTPADDING",(0,0),(-1,-1),10),("RIGHTPADDING",(0,0),(-1,-1),10),
-            ("TOPPADDING",(0,0),(-1,-1),6),("BOTTOMPADDING",(0,0),(-1,-1),6)]))
-        story.append(nt)
-
-    # ── FOOTER ──
-    story += [Spacer(1,4*mm), HRFlowable(width=W, thickness=0.5, color=BORD),
-              Spacer(1,1*mm)]
-    ft = Table([[
-        P("Heart Disease Prediction System · Logistic Regression · "
-          "UCI (n=302) · 5-Fold CV · Acc: 83.6% · Recall: 84.9%",
-          7.5, GREY),
-        P("Logistic Regression · Acc: 83.61% · Recall: 84.85% · F1: 84.85% · ROC-AUC: 0.9058",
-          7.5, GREY, align=TA_RIGHT)
-    ]], colWidths=[W*0.55, W*0.45])
-    ft.setStyle(TableStyle([
-        ("VALIGN",(0,0),(-1,-1),"MIDDLE"),
-        ("LEFTPADDING",(0,0),(-1,-1),0),("RIGHTPADDING",(0,0),(-1,-1),0),
-        ("TOPPADDING",(0,0),(-1,-1),0),("BOTTOMPADDING",(0,0),(-1,-1),0)]))
-    story.append(ft)
-
-    doc.build(story)
-    buf.seek(0)
-    return buf.read()
+def build_pdf(args, meta):
+    with metrics.span("report.pdf"):
+        return make_pdf_bytes(**args, **meta)
 
+def pdf_download(slot, job, fname):
+    try:
+        data = job.result(timeout=60)
+    except Exception as e:
+        slot.error(f"PDF report failed: {e}")
+        return
+    slot.download_button(
+        label="📄 Download PDF Report",
+        data=data,
+        file_name=fname,
+        mime="application/pdf",
+        use_container_width=True
+    )
 
 # ══════════════════════════════════════════════════════════════════════════════
 # PAGE
 # ══════════════════════════════════════════════════════════════════════════════
 
 # ── Header ────────────────────────────────────────────────────────────────────
-st.markdown("""
+st.markdown(compact("""
 <div style="
   background: linear-gradient(135deg, #C44569 0%, #FF6B9D 50%, #FFA07A 100%);
   border-radius: 20px 20px 0 0;
@@ -490,233 +338,346 @@ st.markdown("""
   56%    {transform:scale(1)}
 }
 </style>
-""", unsafe_allow_html=True)
-
-# ── Patient row ───────────────────────────────────────────────────────────────
-r0c1, r0c2, r0c3 = st.columns([2, 1.5, 1.5])
-pname = r0c1.text_input("Patient Name / ID",  placeholder="e.g. Patient 001", key="w_pname")
-pdob  = r0c2.date_input("Date of Birth", value=None,
-                         min_value=date(1900,1,1), max_value=date.today(),
-                         key="w_pdob", format="DD/MM/YYYY")
-pref  = r0c3.text_input("Referring Clinician", placeholder="Dr. ...", key="w_pref")
-st.markdown("<hr style='margin:3px 0 4px 0;'/>", unsafe_allow_html=True)
-
-# ── 5 columns ────────────────────────────────────────────────────────────────
-c1, c2, c3, c4, c5 = st.columns([1, 1, 1, 1, 1.15])
-
-# COL 1
-with c1:
-    st.markdown("<div class='spill'>👤 Demographics & Vitals</div>", unsafe_allow_html=True)
-    age      = st.number_input("Age (yrs)", 1, 120, 50, key="w_age")
-    ab = ("bg","Low risk") if age<45 else ("by","Moderate") if age<60 else ("br","Elevated")
-    st.markdown(f"<span class='badge {ab[0]}'>{ab[1]}</span>", unsafe_allow_html=True)
-    sex      = st.selectbox("Sex", [0,1],
-                             format_func=lambda x:"♀ Female" if x==0 else "♂ Male", key="w_sex")
-    trestbps = st.number_input("Resting BP (mmHg)", 50, 250, 120, key="w_bp")
-    bb = ("bg","Normal") if trestbps<120 else ("by","Elevated") if trestbps<140 else ("br","High BP")
-    st.markdown(f"<span class='badge {bb[0]}'>{bb[1]}</span>", unsafe_allow_html=True)
-    chol     = st.number_input("Cholesterol (mg/dL)", 50, 600, 200, key="w_chol")
-    cb = ("bg","Desirable") if chol<200 else ("by","Borderline") if chol<240 else ("br","High")
-    st.markdown(f"<span class='badge {cb[0]}'>{cb[1]}</span>", unsafe_allow_html=True)
-    thalach  = st.number_input("Max HR (bpm)", 50, 250, 150, key="w_hr")
-    pct = int(thalach / max(220 - age, 1) * 100)
-    hb = ("bg",f"{pct}%") if pct>=85 else ("by",f"{pct}%") if pct>=70 else ("br",f"{pct}%")
-    st.markdown(f"<span class='badge {hb[0]}'>HR {hb[1]} est.max</span>", unsafe_allow_html=True)
-
-# COL 2
-with c2:
-    st.markdown("<div class='spill'>🏥 Blood & ECG</div>", unsafe_allow_html=True)
-    fbs     = st.selectbox("Fasting Sugar >120", [0,1],
-                            format_func=lambda x:"No" if x==0 else "Yes", key="w_fbs")
-    if fbs==1:
-        st.markdown("<span class='badge br'>Elevated glucose</span>", unsafe_allow_html=True)
-    restecg = st.selectbox("Resting ECG", [0,1,2],
-                            format_func=lambda x:["Normal","ST-T Abnormal","LVH"][x], key="w_ecg")
-    if restecg>0:
-        st.markdown("<span class='badge by'>ECG abnormality</span>", unsafe_allow_html=True)
-    oldpeak = st.number_input("ST Depression", 0.0, 10.0, 1.0, 0.1, key="w_st")
-    ob = ("bg","None") if oldpeak==0 else ("by","Mild") if oldpeak<=2 else ("br","Significant")
-    st.markdown(f"<span class='badge {ob[0]}'>ST: {ob[1]}</span>", unsafe_allow_html=True)
-    slope   = st.selectbox("ST Slope", [0,1,2],
-                            format_func=lambda x:["Upsloping","Flat","Downsloping"][x], key="w_slope")
-    slb = ("bg","Favourable") if slope==0 else ("by","Intermediate") if slope==1 else ("br","Ischaemic")
-    st.markdown(f"<span class='badge {slb[0]}'>{slb[1]}</span>", unsafe_allow_html=True)
-
-# COL 3
-with c3:
-    st.markdown("<div class='spill'>💊 Clinical Findings</div>", unsafe_allow_html=True)
-    cp    = st.selectbox("Chest Pain", [0,1,2,3],
-                          format_func=lambda x:["Typical Angina","Atypical",
-                                                "Non-anginal","Asymptomatic"][x], key="w_cp")
-    cpb = ("br","Classic cardiac") if cp==0 else ("by","Possible") if cp==1 \
-          else ("bg","Less likely") if cp==2 else ("by","Evaluate")
-    st.markdown(f"<span class='badge {cpb[0]}'>{cpb[1]}</span>", unsafe_allow_html=True)
-    exang = st.selectbox("Exercise Angina", [0,1],
-                          format_func=lambda x:"No" if x==0 else "Yes", key="w_exang")
-    st.markdown(
-        f"<span class='badge {'br' if exang==1 else 'bg'}'>{'Positive' if exang==1 else 'Negative'}</span>",
-        unsafe_allow_html=True)
-    ca    = st.selectbox("Major Vessels (0–4)", [0,1,2,3,4], key="w_ca")
-    st.markdown(f"<span class='badge {['bg','by','br','br','br'][ca]}'>"
-                f"{['No blockage','1 blocked','2 blocked','3 blocked','4 blocked'][ca]}</span>",
-                unsafe_allow_html=True)
-    thal  = st.selectbox("Thalassemia", [0,1,2,3],
-                          format_func=lambda x:["Normal","Fixed Defect",
-                                                "Reversible","Unknown"][x], key="w_thal")
-    thb = ("bg","Normal") if thal==0 else ("by","Permanent") if thal==1 \
-          else ("br","Ischaemic") if thal==2 else ("by","Unknown")
-    st.markdown(f"<span class='badge {thb[0]}'>{thb[1]}</span>", unsafe_allow_html=True)
-
-# COL 4
-with c4:
-    st.markdown("<div class='spill'>📝 Notes & Predict</div>", unsafe_allow_html=True)
-    notes = st.text_area("Clinician Notes",
-                          placeholder="Clinical observations, medications,\nhistory... (included in PDF)",
-                          height=155, key="w_notes", label_visibility="visible")
-    st.markdown("<div style='height:3px;'></div>", unsafe_allow_html=True)
-    predict_btn = st.button("🔍 Predict Risk", type="primary", use_container_width=True)
-    st.markdown("""
-    <div style="margin-top:6px;padding:6px 10px;background:#FFF3CD;border-radius:8px;
-      border-left:3px solid #F39C12;font-size:.76rem;color:#856404;
-      white-space:nowrap;overflow:hidden;text-overflow:ellipsis;">
-      🟡 <strong>LOW</strong> &lt;30% &nbsp; 🟠 <strong>MEDIUM</strong> 30–70% &nbsp; 🔴 <strong>HIGH</strong> &gt;70%
-    </div>""", unsafe_allow_html=True)
-
-# COL 5 — Results
-with c5:
-    st.markdown("<div class='spill'>📊 Prediction Results</div>", unsafe_allow_html=True)
-
-    if predict_btn:
-        inp = pd.DataFrame([{
-            'age':age,'sex':sex,'cp':cp,'trestbps':trestbps,'chol':chol,
-            'fbs':fbs,'restecg':restecg,'thalach':thalach,'exang':exang,
-            'oldpeak':oldpeak,'slope':slope,'ca':ca,'thal':thal
-        }])
-        if model is not None:
-            try:
-                _pred = int(model.predict(inp)[0])
-                _prob = float(model.predict_proba(inp)[0, 1])
-            except Exception as e:
-                st.error(f"Prediction error: {e}")
-                _pred, _prob = 0, 0.5
-        else:
-            import random
-            random.seed(age + sex + cp + ca + int(oldpeak * 10))
-            _prob = round(random.uniform(0.2, 0.8), 3)
-            _pred = 1 if _prob > 0.5 else 0
-            st.caption("⚠️ Demo — model file not found")
-
-        # Store with res_ prefix — never conflicts with w_ widget keys
-        for k,v in [("res_pred",_pred),("res_prob",_prob),
-                     ("res_age",age),("res_sex",sex),("res_cp",cp),
-                     ("res_bp",trestbps),("res_chol",chol),("res_fbs",fbs),
-                     ("res_ecg",restecg),("res_hr",thalach),("res_exang",exang),
-                     ("res_st",oldpeak),("res_slope",slope),("res_ca",ca),
-                     ("res_thal",thal),("res_notes",notes),
-                     ("res_pname",pname),("res_pdob",str(pdob) if pdob else ""),
-                     ("res_pref",pref)]:
-            st.session_state[k] = v
-
-    if "res_prob" in st.session_state:
-        prob  = st.session_state["res_prob"]
-        pred  = st.session_state["res_pred"]
-        risk  = "LOW" if prob<0.3 else "MEDIUM" if prob<0.7 else "HIGH"
-        rcls  = {"LOW":"r-low","MEDIUM":"r-med","HIGH":"r-high"}[risk]
-        ricon = {"LOW":"✅","MEDIUM":"⚡","HIGH":"⚠️"}[risk]
-        rclr  = {"LOW":"#27AE60","MEDIUM":"#F39C12","HIGH":"#E74C3C"}[risk]
-        rec   = {"LOW":"Maintain healthy lifestyle & annual check-ups.",
-                 "MEDIUM":"Schedule GP appointment within 4 weeks.",
-                 "HIGH":"Seek urgent cardiology referral immediately."}[risk]
+"""), unsafe_allow_html=True)
 
-        st.markdown(f"""
-        <div class="rcard {rcls}">
-          <p class="rt">{ricon} {risk} RISK</p>
-          <p class="rp">Probability: <strong>{prob*100:.1f}%</strong></p>
-          <p class="rr">{'❤️ Heart Disease Detected' if pred==1 else '💚 No Disease Detected'}</p>
-        </div>""", unsafe_allow_html=True)
+# Assessment above, batch panel and footer below; the assessment runs last so
+# its deferred PDF wait holds nothing else up
+top, bottom = st.container(), st.container()
 
-        m1, m2 = st.columns(2)
-        m1.metric("Confidence", f"{max(prob,1-prob)*100:.0f}%")
-        m2.metric("Result", "Disease" if pred==1 else "Healthy")
-
-        fig = go.Figure(go.Indicator(
-            mode="gauge+number", value=prob*100,
-            number={'font':{'size':16,'color':rclr},'suffix':'%'},
-            title={'text':"Risk %",'font':{'size':10,'color':'#C44569'}},
-            gauge={'axis':{'range':[0,100],'tickfont':{'size':8}},
-                   'bar':{'color':rclr,'thickness':0.65},
-                   'steps':[{'range':[0,30],'color':'rgba(39,174,96,0.12)'},
-                             {'range':[30,70],'color':'rgba(243,156,18,0.12)'},
-                             {'range':[70,100],'color':'rgba(231,76,60,0.12)'}],
-                   'threshold':{'line':{'color':'#C44569','width':2},'value':50}}
-        ))
-        fig.update_layout(height=130, margin=dict(l=4,r=4,t=22,b=2),
-                          paper_bgcolor='rgba(0,0,0,0)')
-        st.plotly_chart(fig, use_container_width=True)
-
-        st.markdown(f"<p style='font-size:.8rem;color:{rclr};font-weight:700;margin:0;'>💡 {rec}</p>",
+# ══════════════════════════════════════════════════════════════════════════════
+# ASSESSMENT (fragment): patient row, inputs, results, what-if
+# ══════════════════════════════════════════════════════════════════════════════
+@fragment
+def assessment():
+    t0, pdf_job = time.perf_counter(), None
+    # ── Patient row ───────────────────────────────────────────────────────────
+    r0c1, r0c2, r0c3 = st.columns([2, 1.5, 1.5])
+    pname = r0c1.text_input("Patient Name / ID",  placeholder="e.g. Patient 001", key="w_pname")
+    pdob  = r0c2.date_input("Date of Birth", value=None,
+                             min_value=date(1900,1,1), max_value=date.today(),
+                             key="w_pdob", format="DD/MM/YYYY")
+    pref  = r0c3.text_input("Referring Clinician", placeholder="Dr. ...", key="w_pref")
+    st.markdown("<hr style='margin:3px 0 4px 0;'/>", unsafe_allow_html=True)
+
+    # ── 5 columns ────────────────────────────────────────────────────────────
+    c1, c2, c3, c4, c5 = st.columns([1, 1, 1, 1, 1.15])
+
+    # COL 1
+    with c1:
+        st.markdown("<div class='spill'>👤 Demographics & Vitals</div>", unsafe_allow_html=True)
+        age      = st.number_input("Age (yrs)", 1, 120, 50, key="w_age")
+        ab = ("bg","Low risk") if age<45 else ("by","Moderate") if age<60 else ("br","Elevated")
+        st.markdown(f"<span class='badge {ab[0]}'>{ab[1]}</span>", unsafe_allow_html=True)
+        sex      = st.selectbox("Sex", [0,1],
+                                 format_func=lambda x:"♀ Female" if x==0 else "♂ Male", key="w_sex")
+        trestbps = st.number_input("Resting BP (mmHg)", 50, 250, 120, key="w_bp")
+        bb = ("bg","Normal") if trestbps<120 else ("by","Elevated") if trestbps<140 else ("br","High BP")
+        st.markdown(f"<span class='badge {bb[0]}'>{bb[1]}</span>", unsafe_allow_html=True)
+        chol     = st.number_input("Cholesterol (mg/dL)", 50, 600, 200, key="w_chol")
+        cb = ("bg","Desirable") if chol<200 else ("by","Borderline") if chol<240 else ("br","High")
+        st.markdown(f"<span class='badge {cb[0]}'>{cb[1]}</span>", unsafe_allow_html=True)
+        thalach  = st.number_input("Max HR (bpm)", 50, 250, 150, key="w_hr")
+        pct = int(thalach / max(220 - age, 1) * 100)
+        hb = ("bg",f"{pct}%") if pct>=85 else ("by",f"{pct}%") if pct>=70 else ("br",f"{pct}%")
+        st.markdown(f"<span class='badge {hb[0]}'>HR {hb[1]} est.max</span>", unsafe_allow_html=True)
+
+    # COL 2
+    with c2:
+        st.markdown("<div class='spill'>🏥 Blood & ECG</div>", unsafe_allow_html=True)
+        fbs     = st.selectbox("Fasting Sugar >120", [0,1],
+                                format_func=lambda x:"No" if x==0 else "Yes", key="w_fbs")
+        if fbs==1:
+            st.markdown("<span class='badge br'>Elevated glucose</span>", unsafe_allow_html=True)
+        restecg = st.selectbox("Resting ECG", [0,1,2],
+                                format_func=lambda x:["Normal","ST-T Abnormal","LVH"][x], key="w_ecg")
+        if restecg>0:
+            st.markdown("<span class='badge by'>ECG abnormality</span>", unsafe_allow_html=True)
+        oldpeak = st.number_input("ST Depression", 0.0, 10.0, 1.0, 0.1, key="w_st")
+        ob = ("bg","None") if oldpeak==0 else ("by","Mild") if oldpeak<=2 else ("br","Significant")
+        st.markdown(f"<span class='badge {ob[0]}'>ST: {ob[1]}</span>", unsafe_allow_html=True)
+        slope   = st.selectbox("ST Slope", [0,1,2],
+                                format_func=lambda x:["Upsloping","Flat","Downsloping"][x], key="w_slope")
+        slb = ("bg","Favourable") if slope==0 else ("by","Intermediate") if slope==1 else ("br","Ischaemic")
+        st.markdown(f"<span class='badge {slb[0]}'>{slb[1]}</span>", unsafe_allow_html=True)
+
+    # COL 3
+    with c3:
+        st.markdown("<div class='spill'>💊 Clinical Findings</div>", unsafe_allow_html=True)
+        cp    = st.selectbox("Chest Pain", [0,1,2,3],
+                              format_func=lambda x:["Typical Angina","Atypical",
+                                                    "Non-anginal","Asymptomatic"][x], key="w_cp")
+        cpb = ("br","Classic cardiac") if cp==0 else ("by","Possible") if cp==1 \
+              else ("bg","Less likely") if cp==2 else ("by","Evaluate")
+        st.markdown(f"<span class='badge {cpb[0]}'>{cpb[1]}</span>", unsafe_allow_html=True)
+        exang = st.selectbox("Exercise Angina", [0,1],
+                              format_func=lambda x:"No" if x==0 else "Yes", key="w_exang")
+        st.markdown(
+            f"<span class='badge {'br' if exang==1 else 'bg'}'>{'Positive' if exang==1 else 'Negative'}</span>",
+            unsafe_allow_html=True)
+        ca    = st.selectbox("Major Vessels (0–4)", [0,1,2,3,4], key="w_ca")
+        st.markdown(f"<span class='badge {['bg','by','br','br','br'][ca]}'>"
+                    f"{['No blockage','1 blocked','2 blocked','3 blocked','4 blocked'][ca]}</span>",
                     unsafe_allow_html=True)
+        thal  = st.selectbox("Thalassemia", [0,1,2,3],
+                              format_func=lambda x:["Normal","Fixed Defect",
+                                                    "Reversible","Unknown"][x], key="w_thal")
+        thb = ("bg","Normal") if thal==0 else ("by","Permanent") if thal==1 \
+              else ("br","Ischaemic") if thal==2 else ("by","Unknown")
+        st.markdown(f"<span class='badge {thb[0]}'>{thb[1]}</span>", unsafe_allow_html=True)
+
+    # COL 4
+    with c4:
+        st.markdown("<div class='spill'>📝 Notes & Predict</div>", unsafe_allow_html=True)
+        notes = st.text_area("Clinician Notes",
+                              placeholder="Clinical observations, medications,\nhistory... (included in PDF)",
+                              height=155, key="w_notes", label_visibility="visible")
+        st.markdown("<div style='height:3px;'></div>", unsafe_allow_html=True)
+        predict_btn = st.button("🔍 Predict Risk", type="primary", use_container_width=True)
+        st.markdown(f"""
+        <div style="margin-top:6px;padding:6px 10px;background:#FFF3CD;border-radius:8px;
+          border-left:3px solid #F39C12;font-size:.76rem;color:#856404;
+          white-space:nowrap;overflow:hidden;text-overflow:ellipsis;">
+          🟡 <strong>LOW</strong> &lt;{LOW_T:.0%} &nbsp; 🟠 <strong>MEDIUM</strong> {LOW_T:.0%}–{HIGH_T:.0%} &nbsp; 🔴 <strong>HIGH</strong> &gt;{HIGH_T:.0%}
+        </div>""", unsafe_allow_html=True)
 
-        d = {k2:st.session_state[k2] for k2 in
-             ["res_age","res_sex","res_cp","res_bp","res_chol","res_fbs",
-              "res_ecg","res_hr","res_exang","res_st","res_slope","res_ca","res_thal"]}
-        d2 = {'age':d['res_age'],'sex':d['res_sex'],'cp':d['res_cp'],
-              'trestbps':d['res_bp'],'chol':d['res_chol'],'fbs':d['res_fbs'],
-              'restecg':d['res_ecg'],'thalach':d['res_hr'],'exang':d['res_exang'],
-              'oldpeak':d['res_st'],'slope':d['res_slope'],'ca':d['res_ca'],
-              'thal':d['res_thal']}
-        rfs = []
-        if d2['age']      >55:  rfs.append(f"Age {d2['age']} yrs — elevated risk >55")
-        if d2['chol']     >240: rfs.append(f"Cholesterol {d2['chol']} mg/dL — high")
-        if d2['trestbps'] >140: rfs.append(f"BP {d2['trestbps']} mmHg — hypertensive")
-        if d2['fbs']      ==1:  rfs.append("Fasting blood sugar >120 mg/dL")
-        if d2['exang']    ==1:  rfs.append("Exercise-induced angina present")
-        if d2['oldpeak']  >2:   rfs.append(f"ST depression {d2['oldpeak']} — significant")
-        if d2['ca']       >0:   rfs.append(f"{d2['ca']} major vessel(s) blocked")
-        if d2['thal']     ==2:  rfs.append("Reversible thalassemia defect")
-        if d2['cp']       ==0:  rfs.append("Typical angina — classic cardiac")
-
-        if rfs:
-            with st.expander(f"⚠️ {len(rfs)} risk factor(s)", expanded=False):
-                for rf in rfs:
-                    st.markdown(f"<span style='font-size:.78rem;'>🔸 {rf}</span>",
-                                unsafe_allow_html=True)
+    # COL 5 — Results
+    with c5:
+        st.markdown("<div class='spill'>📊 Prediction Results</div>", unsafe_allow_html=True)
+
+        if predict_btn:
+            inp = {'age':age,'sex':sex,'cp':cp,'trestbps':trestbps,'chol':chol,
+                   'fbs':fbs,'restecg':restecg,'thalach':thalach,'exang':exang,
+                   'oldpeak':oldpeak,'slope':slope,'ca':ca,'thal':thal}
+            model, _r = load_model(), None
+            if model is not None:
+                try:
+                    with metrics.span("page.predict"):
+                        _r = prediction_cache.predict(inp, model)    # shared across sessions
+                except Exception as e:
+                    st.error(f"Prediction error: {e}")
+            if _r is None:
+                st.session_state.pop("res", None)           # don't leave a stale result on screen
+            else:
+                # One compact record (records.RECORD) plus the free-text report fields;
+                # keys never conflict with the w_ widget keys
+                with metrics.span("page.record"):
+                    st.session_state["res"] = records.one(inp, _r.probability, _r.prediction, _r.risk)
+                st.session_state["res_contrib"] = _r.contributions     # from the same model pass
+                audit(lambda a: a.record(inp, _r.probability, _r.prediction, _r.risk,
+                                         getattr(model, "version", None), pname, "app"))
+                st.session_state["res_meta"] = dict(notes=notes, pname=pname,
+                                                    pdob=str(pdob) if pdob else "", pref=pref)
+
+        if "res" in st.session_state:
+            with metrics.span("page.report_args"):
+                R = records.report_args(st.session_state["res"])
+                R["top"] = attribution.top(st.session_state.get("res_contrib", ()), R["d"])
+            meta  = st.session_state["res_meta"]
+            prob, pred, risk, rfs = R["prob"], R["pred"], R["risk"], R["rfs"]
+            # Start the PDF now; it renders in the background while the panel is drawn
+            pdf_job = load_report_jobs().submit(
+                report_key(sorted(R["d"].items()), pred, prob, meta["notes"],
+                           meta["pname"], meta["pdob"], meta["pref"], tuple(R["top"])),
+                lambda: build_pdf(R, meta),
+                session=session_id())
+            rcls  = {"LOW":"r-low","MEDIUM":"r-med","HIGH":"r-high"}[risk]
+            ricon = {"LOW":"✅","MEDIUM":"⚡","HIGH":"⚠️"}[risk]
+            rclr  = {"LOW":"#27AE60","MEDIUM":"#F39C12","HIGH":"#E74C3C"}[risk]
+            rec   = R["rec"]
+
+            st.markdown(f"""
+            <div class="rcard {rcls}">
+              <p class="rt">{ricon} {risk} RISK</p>
+              <p class="rp">Probability: <strong>{prob*100:.1f}%</strong></p>
+              <p class="rr">{'❤️ Heart Disease Detected' if pred==1 else '💚 No Disease Detected'}</p>
+            </div>""", unsafe_allow_html=True)
+
+            m1, m2 = st.columns(2)
+            m1.metric("Confidence", f"{max(prob,1-prob)*100:.0f}%")
+            m2.metric("Result", "Disease" if pred==1 else "Healthy")
+
+            # Static SVG (cached per value); ?gauge=interactive asks for the Plotly chart
+            with metrics.span("page.gauge"):
+                if st.query_params.get("gauge") == "interactive":
+                    st.plotly_chart(gauge.plotly_figure(prob, rclr), use_container_width=True)
+                else:
+                    st.markdown(gauge.svg(prob, rclr), unsafe_allow_html=True)
+
+            st.markdown(f"<p style='font-size:.8rem;color:{rclr};font-weight:700;margin:0;'>💡 {rec}</p>",
+                        unsafe_allow_html=True)
+
+            if rfs:
+                with st.expander(f"⚠️ {len(rfs)} risk factor(s)", expanded=False):
+                    for rf in rfs:
+                        st.markdown(f"<span style='font-size:.78rem;'>🔸 {rf}</span>",
+                                    unsafe_allow_html=True)
+            else:
+                st.markdown("<span class='badge bg' style='font-size:.74rem;'>"
+                            "✅ No major risk factors</span>", unsafe_allow_html=True)
+
+            # Model's own weighting: largest per-feature logit contributions
+            if R["top"]:
+                with st.expander("📊 What drives this estimate", expanded=False):
+                    st.markdown("<br>".join(
+                        f"<span style='font-size:.78rem;'>{'🔺' if c.logit > 0 else '🔻'} {c.label}: "
+                        f"<b>{c.value}</b> <span style='color:{'#E74C3C' if c.logit > 0 else '#27AE60'};'>"
+                        f"odds ×{c.odds:.2f}</span></span>" for c in R["top"]), unsafe_allow_html=True)
+                    st.caption("Compared with an average patient in the training data.")
+
+            # TRUE PDF download — rebuilt only when the report contents change.
+            # Until the bytes are ready the slot holds a disabled button; it is
+            # filled at the end of the script (see "Deferred PDF download").
+            pn       = (meta["pname"] or "Patient").replace(" ","_")
+            pdf_name = f"HeartRisk_{pn}_{datetime.now().strftime('%Y%m%d_%H%M')}.pdf"
+            pdf_slot = st.empty()
+            if pdf_job.done():
+                pdf_download(pdf_slot, pdf_job, pdf_name)
+            else:
+                pdf_slot.button("⏳ Preparing PDF Report…", disabled=True, use_container_width=True)
         else:
-            st.markdown("<span class='badge bg' style='font-size:.74rem;'>"
-                        "✅ No major risk factors</span>", unsafe_allow_html=True)
-
-        # TRUE PDF download
-        pdf_bytes = make_pdf_bytes(
-            d=d2, pred=pred, prob=prob, risk=risk, rec=rec, rfs=rfs,
-            notes=st.session_state.get("res_notes",""),
-            pname=st.session_state.get("res_pname",""),
-            pdob=st.session_state.get("res_pdob",""),
-            pref=st.session_state.get("res_pref","")
-        )
-        pn    = (st.session_state.get("res_pname","") or "Patient").replace(" ","_")
-        fname = f"HeartRisk_{pn}_{datetime.now().strftime('%Y%m%d_%H%M')}.pdf"
-        st.download_button(
-            label="📄 Download PDF Report",
-            data=pdf_bytes,
-            file_name=fname,
-            mime="application/pdf",
-            use_container_width=True
-        )
-    else:
-        st.markdown("""
-        <div style="text-align:center;padding:30px 8px;">
-          <div style="font-size:2.4rem;">❤️</div>
-          <div style="font-size:.84rem;color:#bbb;margin-top:8px;">
-            Fill in patient data<br>and click <strong>Predict Risk</strong>
-          </div>
-        </div>""", unsafe_allow_html=True)
+            st.markdown("""
+            <div style="text-align:center;padding:30px 8px;">
+              <div style="font-size:2.4rem;">❤️</div>
+              <div style="font-size:.84rem;color:#bbb;margin-top:8px;">
+                Fill in patient data<br>and click <strong>Predict Risk</strong>
+              </div>
+            </div>""", unsafe_allow_html=True)
+
+    # ── What-if sweep ────────────────────────────────────────────────────────
+    # One or two values swept around the current patient, scored as one batch and
+    # cached per patient + model version; drawn only while "Show" is on.
+    with st.expander("🔀 What-if — how risk moves as one or two values change", expanded=False):
+        if "res" not in st.session_state:
+            st.caption("Run a prediction first; the sweep starts from that patient.")
+        else:
+            opts = list(whatif.RANGES)
+            w1, w2, w3 = st.columns([2, 2, 1])
+            wx = w1.selectbox("Vary", opts, index=0, format_func=attribution.LABELS.get, key="w_wi_x")
+            wy = w2.selectbox("Against", [None] + [o for o in opts if o != wx], index=0,
+                              format_func=lambda f: "— (risk curve)" if f is None else attribution.LABELS[f],
+                              key="w_wi_y")
+            w3.markdown("<div style='height:28px;'></div>", unsafe_allow_html=True)
+            if w3.toggle("Show", key="w_wi_on"):
+                model = load_model()
+                if model is not None:
+                    wrec = st.session_state["res"]
+                    wd   = records.features(wrec)
+                    with metrics.span("page.whatif"):
+                        sw = whatif.sweep(wd, wx, wy, model)
+                        st.plotly_chart(whatif.figure(sw, wd, float(wrec["probability"])),
+                                        use_container_width=True)
+                    st.caption(f"{sw.prob.size:,} variants of this patient scored in one call; "
+                               "all other values as entered.")
+
+    metrics.observe("page.assessment", time.perf_counter() - t0)
+
+    # ── Deferred PDF download ────────────────────────────────────────────────
+    # Everything above is already on screen; now wait for the report and turn the
+    # download button on.
+    if pdf_job is not None and not pdf_job.done():
+        pdf_download(pdf_slot, pdf_job, pdf_name)
 
-# ── Footer ───────────────────────────────────────────────────────────────────
-st.markdown("""
-<div class="disc">
-  ❤️ Heart Disease Risk Predictor &nbsp;·&nbsp;
-  Logistic Regression &nbsp;·&nbsp; ROC-AUC 0.9058 &nbsp;·&nbsp;
-  Acc: 83.61% &nbsp;·&nbsp; Recall: 84.85% &nbsp;·&nbsp; F1: 84.85% &nbsp;·&nbsp;
-  UCI Dataset (n=302) &nbsp;·&nbsp; 5-Fold CV
-</div>
-""", unsafe_allow_html=True)
+
+# ══════════════════════════════════════════════════════════════════════════════
+# BATCH (fragment)
+# ══════════════════════════════════════════════════════════════════════════════
+@fragment
+def batch_panel():
+    with st.expander("📂 Batch scoring — upload a clinic list (CSV)", expanded=False):
+        st.caption("One row per patient with the 13 columns of heart.csv "
+                   f"({', '.join(FEATURES)}). Extra columns (IDs, names) are kept in the output.")
+        up = st.file_uploader("Patient CSV", type=["csv"], key="w_batch_csv")
+        if up is not None:
+            model = load_model()
+            if model is not None:
+                # Scored once per upload and model version, kept as compact records so
+                # reruns (typing notes, another Predict) don't re-read or re-score the file
+                bkey  = (up.file_id, getattr(model, "version", None))
+                batch = st.session_state.get("res_batch")
+                if batch is None or batch[0] != bkey:
+                    try:
+                        with metrics.span("page.batch_read"):
+                            raw = pd.read_csv(up)
+                    except Exception as e:
+                        raw = None
+                        st.error(f"Could not read CSV: {e}")
+                    batch = None
+                    if raw is not None:
+                        X, errs = scoring.validate(raw)
+                        if errs:
+                            st.error("CSV rejected:\n\n" + "\n".join(f"- {e}" for e in errs))
+                        else:
+                            with metrics.span("page.batch_score"):
+                                res   = scoring.score_frame(X, model, messages=False)
+                                batch = (bkey, records.from_frame(res), raw.drop(columns=FEATURES))
+                            st.session_state["res_batch"] = batch
+                            audit(lambda a: a.record_frame(X, res, bkey[1], raw.get(audit_log.REF), "app-batch"))
+                if batch is not None:
+                    _, recs, extra = batch
+                    vc = np.bincount(recs["risk"], minlength=3)
+                    b1, b2, b3, b4 = st.columns(4)
+                    b1.metric("Patients", f"{len(recs):,}")
+                    b2.metric("🔴 High",   f"{vc[2]:,}")
+                    b3.metric("🟠 Medium", f"{vc[1]:,}")
+                    b4.metric("🟢 Low",    f"{vc[0]:,}")
+                    with metrics.span("page.batch_table"):
+                        res = pd.concat([extra.reset_index(drop=True), records.to_frame(recs)], axis=1)
+                        res['probability'] = res['probability'].round(4)
+                        st.dataframe(res.head(200), use_container_width=True, height=240)
+                    with metrics.span("page.batch_csv"):
+                        csv = res.to_csv(index=False).encode("utf-8")
+                    st.download_button(
+                        label="📥 Download scored CSV",
+                        data=csv,
+                        file_name=f"HeartRisk_batch_{datetime.now().strftime('%Y%m%d_%H%M')}.csv",
+                        mime="text/csv",
+                        use_container_width=True
+                    )
+
+# ── Layout ───────────────────────────────────────────────────────────────────
+with bottom:
+    batch_panel()
+    st.markdown("""
+    <div class="disc">
+      ❤️ Heart Disease Risk Predictor &nbsp;·&nbsp;
+      Logistic Regression &nbsp;·&nbsp; ROC-AUC 0.9058 &nbsp;·&nbsp;
+      Acc: 83.61% &nbsp;·&nbsp; Recall: 84.85% &nbsp;·&nbsp; F1: 84.85% &nbsp;·&nbsp;
+      UCI Dataset (n=302) &nbsp;·&nbsp; 5-Fold CV
+    </div>
+    """, unsafe_allow_html=True)
+
+with top:
+    assessment()
+
+metrics.observe("page.run", time.perf_counter() - _t_run)
+
+# ── Background warm-up ───────────────────────────────────────────────────────
+# Runs after the page has been sent: loads the model and ReportLab assets so the
+# first Predict doesn't pay for them.
+# cache_resource makes it once per server process.
+def _warm_report():
+    import report
+    report.warm()
+
+@st.cache_resource
+def warm_up():
+    def work():
+        for step in (scoring.get_model, _warm_report):
+            try:
+                step()
+            except Exception:
+                pass
+    t = threading.Thread(target=work, name="warm-up", daemon=True)
+    t.start()
+    return t
+
+warm_up()
+
+# ── Metrics exporter ─────────────────────────────────────────────────────────
+# HEART_METRICS_PORT=9108 serves the span histograms on :9108/metrics (once per process)
+@st.cache_resource
+def metrics_exporter():
+    port = os.environ.get("HEART_METRICS_PORT")
+    return metrics.serve(int(port)) if port else None
+
+metrics_exporter()
@@ -0,0 +1,221 @@
+"""Opt-in timing spans for the prediction flow, kept as latency histograms.
+
+    with metrics.span("score.predict_proba"):
+        prob = model.predict_proba(X)[:, 1]
+
+Off by default. While off, `span()` returns one shared no-op context manager
+and `observe()` returns at once, so an instrumented line costs a flag check
+and an empty with-block. Turn it on with HEART_METRICS=1 (or
+metrics.enable()): each span name then gets a fixed-bucket histogram (count,
+sum, max and cumulative bucket counts) shared by every thread in the process.
+
+    metrics.gauge("report_jobs.queued", lambda: jobs.queued)   # current value, read at export
+
+    metrics.prometheus()          # Prometheus text exposition format
+    metrics.snapshot()            # JSON-ready: count, sum, max, p50/p95/p99 per span
+    HEART_METRICS_PORT=9108 streamlit run heart_Disease.py    # GET :9108/metrics
+    python server.py --metrics                                 # GET /metrics, /metrics.json
+
+Quantiles are interpolated within buckets, so they are estimates: exact to
+the bucket bounds, not to the microsecond.
+"""
+import bisect
+import json
+import os
+import threading
+import time
+
+# Upper bounds in seconds; a final +Inf bucket catches the rest
+BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+           0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+FAMILY  = "heart_span_seconds"
+GAUGES  = "heart_gauge"
+
+_enabled = (os.environ.get("HEART_METRICS", "") not in ("", "0")
+            or bool(os.environ.get("HEART_METRICS_PORT")))
+_hists   = {}                                # span name -> Histogram
+_gauges  = {}                                # gauge name -> callable returning a number
+_lock    = threading.Lock()
+
+
+class Histogram:
+    __slots__ = ("lock", "counts", "count", "sum", "max")
+
+    def __init__(self):
+        self.lock   = threading.Lock()
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count  = 0
+        self.sum    = self.max = 0.0
+
+    def observe(self, seconds):
+        i = bisect.bisect_left(BUCKETS, seconds)
+        with self.lock:
+            self.counts[i] += 1
+            self.count += 1
+            self.sum   += seconds
+            if seconds > self.max:
+                self.max = seconds
+
+    # Consistent copy: (per-bucket counts, count, sum, max)
+    def read(self):
+        with self.lock:
+            return list(self.counts), self.count, self.sum, self.max
+
+    def quantile(self, q, state=None):
+        counts, n, _, mx = state or self.read()
+        if not n:
+            return None
+        rank, seen = q * n, 0
+        for i, c in enumerate(counts):
+            if c and seen + c >= rank:
+                lo = BUCKETS[i - 1] if i else 0.0
+                hi = BUCKETS[i] if i < len(BUCKETS) else mx
+                return min(lo + (hi - lo) * (rank - seen) / c, mx)
+            seen += c
+        return mx
+
+
+# ── Recording ────────────────────────────────────────────────────────────────
+def enable(on=True):
+    global _enabled
+    _enabled = bool(on)
+
+def enabled():
+    return _enabled
+
+def reset():
+    with _lock:
+        _hists.clear()
+
+def histogram(name):
+    h = _hists.get(name)
+    if h is None:
+        with _lock:
+            h = _hists.setdefault(name, Histogram())
+    return h
+
+# Levels (queue depth, in-flight jobs) are read from `read()` when exported,
+# so registering one costs nothing on the hot path
+def gauge(name, read):
+    with _lock:
+        _gauges[name] = read
+
+def _read_gauges():
+    with _lock:
+        items = sorted(_gauges.items())
+    out = {}
+    for name, read in items:
+        try:
+            out[name] = float(read())
+        except Exception:
+            continue
+    return out
+
+def observe(name, seconds):
+    if _enabled:
+        histogram(name).observe(seconds)
+
+
+class _Span:
+    __slots__ = ("h", "t0")
+
+    def __init__(self, h):
+        self.h = h
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.h.observe(time.perf_counter() - self.t0)
+
+
+class _Noop:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return None
+
+_NOOP = _Noop()
+
+def span(name):
+    return _Span(histogram(name)) if _enabled else _NOOP
+
+
+# ── Export ───────────────────────────────────────────────────────────────────
+def snapshot():
+    with _lock:
+        items = sorted(_hists.items())
+    out = {}
+    for name, h in items:
+        state = h.read()
+        counts, n, total, mx = state
+        out[name] = {"count": n, "sum_ms": round(total * 1e3, 3), "max_ms": round(mx * 1e3, 3),
+                     **{k: (round(v * 1e3, 3) if v is not None else None)
+                        for k, v in (("p50_ms", h.quantile(0.50, state)),
+                                     ("p95_ms", h.quantile(0.95, state)),
+                                     ("p99_ms", h.quantile(0.99, state)))}}
+    for name, v in _read_gauges().items():
+        out[name] = {"value": v}
+    return out
+
+
+def prometheus():
+    with _lock:
+        items = sorted(_hists.items())
+    lines = [f"# HELP {FAMILY} Time spent in instrumented stages of the prediction flow.",
+             f"# TYPE {FAMILY} histogram"]
+    for name, h in items:
+        counts, n, total, _ = h.read()
+        label, cum = name.replace("\\", "\\\\").replace('"', '\\"'), 0
+        for le, c in zip(BUCKETS + ("+Inf",), counts):
+            cum += c
+            lines.append(f'{FAMILY}_bucket{{span="{label}",le="{le}"}} {cum}')
+        lines.append(f'{FAMILY}_sum{{span="{label}"}} {total!r}')
+        lines.append(f'{FAMILY}_count{{span="{label}"}} {n}')
+    gauges = _read_gauges()
+    if gauges:
+        lines += [f"# HELP {GAUGES} Current levels (queue depths, in-flight jobs).",
+                  f"# TYPE {GAUGES} gauge"]
+        for name, v in gauges.items():
+            label = name.replace("\\", "\\\\").replace('"', '\\"')
+            lines.append(f'{GAUGES}{{name="{label}"}} {v!r}')
+    return "\n".join(lines) + "\n"
+
+
+def dump(path):
+    with open(path, "w") as f:
+        json.dump(snapshot(), f, indent=2)
+        f.write("\n")
+
+
+# Standalone exporter for processes without an HTTP server of their own (the
+# Streamlit app): GET /metrics (Prometheus) and /metrics.json on a daemon thread
+def serve(port, host="127.0.0.1"):
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == "/metrics":
+                body, ctype = prometheus(), "text/plain; version=0.0.4"
+            elif self.path == "/metrics.json":
+                body, ctype = json.dumps(snapshot()), "application/json"
+            else:
+                return self.send_error(404)
+            data = body.encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", ctype)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, fmt, *args):
+            pass
+
+    srv = ThreadingHTTPServer((host, port), Handler)
+    srv.daemon_threads = True
+    threading.Thread(target=srv.serve_forever, name="metrics-exporter", daemon=True).start()
+    return srv
@@ -0,0 +1,263 @@
+"""Versioned model store: memory-mapped NumPy artifacts with hot reload.
+
+    models/
+      CURRENT                  active version name (replaced atomically)
+      v1-3f2a9c1e/
+        manifest.json          version, feature schema, sha256/dtype/shape per file
+        num_idx.npy  num_w.npy  num_mean.npy  cat_idx.npy  ...
+
+Artifacts are the fastpath arrays (scaler folded into the logistic weights,
+plus the scoring layout derived from them) saved as .npy and opened with
+np.load(mmap_mode="r"). FastModel scores straight from those mapped arrays, so
+every worker process reads the same read-only pages instead of unpickling its
+own copy. Format-1 versions (weights only) still load, but their layout is
+computed into private memory. Loading
+checks every file's sha256 and the feature schema against scoring.FEATURES
+and raises ModelStoreError on any mismatch — there is no fallback model.
+
+`Registry` serves the active version and swaps in a newly activated one
+without a restart; the swap is a single reference assignment, so a request
+sees either the old model or the new one, never a mix.
+
+    python model_store.py publish [--model heart_disease_model.joblib]
+    python model_store.py list
+    python model_store.py activate v2-0c1d2e3f
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+import fastpath
+from scoring import FEATURES, MODEL_PATH
+
+STORE_DIR = os.path.join(os.path.dirname(MODEL_PATH), "models")
+FORMAT    = 2
+WEIGHTS   = ["features", "num_idx", "num_w", "num_mean", "cat_idx", "cat_val", "cat_w", "bias"]
+ARRAYS    = WEIGHTS + fastpath.LAYOUT
+FORMATS   = {1: WEIGHTS, 2: ARRAYS}           # arrays stored by each manifest format
+
+log = logging.getLogger(__name__)
+
+
+class ModelStoreError(RuntimeError):
+    pass
+
+
+def _sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+# Write-then-rename so readers never see a half-written file
+def _write_atomic(path, text):
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+    with os.fdopen(fd, "w") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.chmod(tmp, 0o644)
+    os.replace(tmp, path)
+
+
+# ── Versions ─────────────────────────────────────────────────────────────────
+def _number(version):                     # "v12-ab34cd56" -> 12
+    n = version[1:].split("-")[0]
+    return int(n) if n.isdigit() else 0
+
+def versions(root=STORE_DIR):
+    if not os.path.isdir(root):
+        return []
+    vs = [v for v in os.listdir(root) if os.path.isfile(os.path.join(root, v, "manifest.json"))]
+    return sorted(vs, key=lambda v: (_number(v), v))
+
+
+def current_version(root=STORE_DIR):
+    try:
+        with open(os.path.join(root, "CURRENT")) as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        raise ModelStoreError(f"no active model version in {root} (run: python model_store.py publish)")
+
+
+def activate(version, root=STORE_DIR):
+    load(version, root)                       # never point CURRENT at a broken version
+    _write_atomic(os.path.join(root, "CURRENT"), version + "\n")
+
+
+def publish(arrays, root=STORE_DIR, source=None, make_active=True):
+    missing = [k for k in ARRAYS if k not in arrays]
+    if missing:
+        raise ModelStoreError(f"artifact is missing array(s): {', '.join(missing)}")
+    os.makedirs(root, exist_ok=True)
+    tmp = tempfile.mkdtemp(dir=root, prefix=".tmp-")
+    try:
+        files = {}
+        for k in ARRAYS:
+            a = np.ascontiguousarray(arrays[k])
+            np.save(os.path.join(tmp, k + ".npy"), a, allow_pickle=False)
+            files[k] = {"sha256": _sha256(os.path.join(tmp, k + ".npy")),
+                        "dtype": a.dtype.str, "shape": list(a.shape)}
+        digest = hashlib.sha256("".join(files[k]["sha256"] for k in ARRAYS).encode()).hexdigest()
+        same = [v for v in versions(root) if v.endswith("-" + digest[:8])]
+        if same:                              # identical weights already published
+            shutil.rmtree(tmp)
+            version = same[-1]
+        else:
+            n = max([_number(v) for v in versions(root)] or [0]) + 1
+            version  = f"v{n}-{digest[:8]}"
+            manifest = {"format": FORMAT, "version": version, "digest": digest,
+                        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                        "features": FEATURES, "files": files, "source": source}
+            _write_atomic(os.path.join(tmp, "manifest.json"), json.dumps(manifest, indent=2) + "\n")
+            os.chmod(tmp, 0o755)
+            os.rename(tmp, os.path.join(root, version))
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+    if make_active:
+        activate(version, root)
+    return version
+
+
+# ── Loading ──────────────────────────────────────────────────────────────────
+def load(version=None, root=STORE_DIR):
+    version = version or current_version(root)
+    vdir    = os.path.join(root, version)
+    try:
+        with open(os.path.join(vdir, "manifest.json")) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError) as e:
+        raise ModelStoreError(f"model {version}: unreadable manifest ({e})")
+    names = FORMATS.get(manifest.get("format"))
+    if names is None or manifest.get("version") != version:
+        raise ModelStoreError(f"model {version}: unsupported or mismatched manifest")
+    if manifest.get("features") != FEATURES:
+        raise ModelStoreError(f"model {version}: schema {manifest.get('features')} != {FEATURES}")
+    arrays = {}
+    for k in names:
+        spec, path = manifest["files"].get(k), os.path.join(vdir, k + ".npy")
+        if spec is None or not os.path.isfile(path):
+            raise ModelStoreError(f"model {version}: missing {k}.npy")
+        if _sha256(path) != spec["sha256"]:
+            raise ModelStoreError(f"model {version}: checksum mismatch for {k}.npy")
+        a = np.load(path, mmap_mode="r", allow_pickle=False)
+        if a.dtype.str != spec["dtype"] or list(a.shape) != spec["shape"]:
+            raise ModelStoreError(f"model {version}: {k}.npy is {a.dtype.str}{list(a.shape)}, "
+                                  f"manifest says {spec['dtype']}{spec['shape']}")
+        arrays[k] = a
+    if not (len(arrays["num_idx"]) == len(arrays["num_w"]) == len(arrays["num_mean"])
+            and len(arrays["cat_idx"]) == len(arrays["cat_val"]) == len(arrays["cat_w"])):
+        raise ModelStoreError(f"model {version}: inconsistent weight array lengths")
+    if "gather" in arrays and not (arrays["wf"].shape == (len(arrays["gather"]), len(FEATURES))
+                                   and len(arrays["gather"]) == len(arrays["w"])
+                                   == len(arrays["num_idx"]) + len(arrays["cat_idx"])
+                                   and arrays["ref"].shape == (len(FEATURES),)):
+        raise ModelStoreError(f"model {version}: scoring layout doesn't match the weights")
+    try:
+        model = fastpath.FastModel(arrays)
+    except ValueError as e:
+        raise ModelStoreError(f"model {version}: {e}")
+    model.version, model.manifest = version, manifest
+    return model
+
+
+# ── Registry (hot reload) ────────────────────────────────────────────────────
+class Registry:
+    def __init__(self, root=STORE_DIR, check_every=2.0):
+        self.root        = root
+        self.check_every = check_every
+        self.lock        = threading.Lock()
+        self.model       = load(None, root)   # raises: no model, no service
+        self.checked     = time.monotonic()
+        self.last_error  = None
+
+    @property
+    def version(self):
+        return self.model.version
+
+    # Current model; re-reads CURRENT at most every `check_every` seconds
+    def get(self):
+        if time.monotonic() - self.checked >= self.check_every:
+            self.refresh()
+        return self.model
+
+    def refresh(self):
+        with self.lock:
+            self.checked = time.monotonic()
+            try:
+                v = current_version(self.root)
+                if v != self.model.version:
+                    new = load(v, self.root)
+                    self.model, self.last_error = new, None
+                    log.warning("model store: switched to %s", v)
+            except ModelStoreError as e:
+                # A bad activation must not take down a healthy process: keep serving
+                # the last verified version and report the failure.
+                if str(e) != self.last_error:
+                    log.error("model store: keeping %s, reload failed: %s", self.model.version, e)
+                self.last_error = str(e)
+        return self.model
+
+
+_REGISTRY, _REGISTRY_LOCK = None, threading.Lock()
+
+def registry():
+    global _REGISTRY
+    if _REGISTRY is None:
+        with _REGISTRY_LOCK:
+            if _REGISTRY is None:
+                _REGISTRY = Registry(os.environ.get("HEART_MODEL_STORE", STORE_DIR))
+    return _REGISTRY
+
+
+# ── CLI ──────────────────────────────────────────────────────────────────────
+def main(argv=None):
+    import pandas as pd
+    import scoring
+
+    ap  = argparse.ArgumentParser(description="Versioned model store")
+    ap.add_argument("--store", default=STORE_DIR)
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("publish", help="export a joblib pipeline, verify it and publish a version")
+    p.add_argument("--model", default=MODEL_PATH)
+    p.add_argument("--data",  default=os.path.join(os.path.dirname(MODEL_PATH), "heart.csv"))
+    p.add_argument("--no-activate", action="store_true")
+    sub.add_parser("list", help="show versions; * marks the active one")
+    p = sub.add_parser("activate", help="make a published version active")
+    p.add_argument("version")
+    a = ap.parse_args(argv)
+
+    if a.cmd == "publish":
+        pipe = scoring.load_model(a.model)
+        arr  = fastpath.export_arrays(pipe)
+        err  = fastpath.verify(fastpath.FastModel(arr), pipe, pd.read_csv(a.data)[FEATURES])
+        v    = publish(arr, a.store, source={"path": os.path.basename(a.model), "sha256": _sha256(a.model)},
+                       make_active=not a.no_activate)
+        print(f"published {v}  (max |Δ| vs sklearn {err:.1e}){'' if a.no_activate else ', active'}")
+    elif a.cmd == "activate":
+        activate(a.version, a.store)
+        print(f"active: {a.version}")
+    else:
+        try:
+            cur = current_version(a.store)
+        except ModelStoreError:
+            cur = None
+        for v in versions(a.store):
+            with open(os.path.join(a.store, v, "manifest.json")) as f:
+                m = json.load(f)
+            print(f"{'*' if v == cur else ' '} {v:<16} {m['created']}  {(m.get('source') or {}).get('path', '')}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""Multi-core batch scoring over shared-memory buffers.
+
+The feature matrix is copied once into a shared-memory block; workers get only
+(buffer name, shape, row range) and write probabilities straight into a second
+shared block, so no DataFrame or result array is ever pickled. Each worker
+holds its own copy of the model (passed once, at pool start).
+
+`ParallelScorer` has the model interface (`predict_proba`, `predict`,
+`version`, and `explain` when the model has it: contributions come back
+through a third shared block), so it drops into scoring.score_frame or
+stream_score unchanged:
+
+    with ParallelScorer(scoring.get_model(), workers=8) as ps:
+        res = scoring.score_frame(X, ps)
+
+Benchmark over 1..N workers: python benchmarks/bench_parallel.py
+"""
+import multiprocessing as mp
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from fastpath import FastModel
+from scoring import FEATURES
+
+BLOCK = 65_536          # rows per task: bounds each worker's temporaries, balances load
+
+
+# ── Worker side ──────────────────────────────────────────────────────────────
+_MODEL, _ATTACHED = None, {}                 # (in, out[, contrib]) names -> shared blocks
+
+def _init(model):
+    global _MODEL
+    _MODEL = model
+
+def _attach(names):
+    if names not in _ATTACHED:
+        for pair in _ATTACHED.values():      # the parent replaced its buffers
+            for shm in pair:
+                shm.close()
+        _ATTACHED.clear()
+        _ATTACHED[names] = tuple(shared_memory.SharedMemory(name=n) for n in names)
+    return _ATTACHED[names]
+
+# names: (in, out) writes probabilities; (in, out, contrib) writes explain()'s
+# logits and per-feature contributions
+def _work(task):
+    names, n, start, stop = task
+    shm = _attach(names)
+    A   = np.ndarray((n, len(FEATURES)), np.float64, shm[0].buf)[start:stop]
+    out = np.ndarray((n,), np.float64, shm[1].buf)
+    if len(shm) == 3:
+        C = np.ndarray((n, len(FEATURES)), np.float64, shm[2].buf)
+        out[start:stop], C[start:stop] = _MODEL.explain(A)
+        return stop - start
+    X   = A if isinstance(_MODEL, FastModel) else pd.DataFrame(A, columns=FEATURES)   # sklearn selects by name
+    out[start:stop] = _MODEL.predict_proba(X)[:, 1]
+    return stop - start
+
+
+# ── Parent side ──────────────────────────────────────────────────────────────
+class ParallelScorer:
+    def __init__(self, model, workers=None, block=BLOCK):
+        self.model   = model
+        self.workers = workers or os.cpu_count()
+        self.block   = block
+        self.version = getattr(model, "version", None)
+        ctx = mp.get_context("fork") if "fork" in mp.get_all_start_methods() else None
+        self.pool = ProcessPoolExecutor(self.workers, mp_context=ctx,
+                                        initializer=_init, initargs=(model,))
+        self.shm_in = self.shm_out = self.shm_contrib = None
+        self.cap = 0
+        if hasattr(model, "explain"):
+            self.explain = self._explain
+
+    # Shared buffers are reused across calls and only grown when a batch is larger
+    def _buffers(self, n):
+        if n > self.cap:
+            self._release()
+            self.shm_in  = shared_memory.SharedMemory(create=True, size=n * len(FEATURES) * 8)
+            self.shm_out = shared_memory.SharedMemory(create=True, size=n * 8)
+            self.cap = n
+        return (np.ndarray((n, len(FEATURES)), np.float64, self.shm_in.buf),
+                np.ndarray((n,), np.float64, self.shm_out.buf))
+
+    def _contrib(self, n):
+        if self.shm_contrib is None:
+            self.shm_contrib = shared_memory.SharedMemory(create=True, size=self.cap * len(FEATURES) * 8)
+        return np.ndarray((n, len(FEATURES)), np.float64, self.shm_contrib.buf)
+
+    def _run(self, X, contributions=False):
+        A = X[FEATURES].to_numpy(dtype=np.float64) if hasattr(X, "columns") else np.asarray(X, np.float64)
+        n = len(A)
+        buf_in, buf_out = self._buffers(n)
+        buf_in[:] = A
+        names = (self.shm_in.name, self.shm_out.name)
+        if contributions:
+            C     = self._contrib(n)
+            names = names + (self.shm_contrib.name,)
+        step  = max(1, min(self.block, -(-n // self.workers)))
+        tasks = [(names, n, s, min(s + step, n)) for s in range(0, n, step)]
+        done  = sum(self.pool.map(_work, tasks))
+        if done != n:
+            raise RuntimeError(f"parallel scoring covered {done} of {n} rows")
+        return (buf_out.copy(), C.copy()) if contributions else buf_out.copy()
+
+    def proba(self, X):
+        if len(X) == 0:
+            return np.empty(0)
+        return self._run(X)
+
+    # Same (logits, contributions) as the model's own explain; only set when it has one
+    def _explain(self, X):
+        if len(X) == 0:
+            return np.empty(0), np.empty((0, len(FEATURES)))
+        return self._run(X, contributions=True)
+
+    def predict_proba(self, X):
+        p = self.proba(X)
+        return np.column_stack([1.0 - p, p])
+
+    def predict(self, X):
+        return (self.proba(X) > 0.5).astype(np.int64)
+
+    def _release(self):
+        for shm in (self.shm_in, self.shm_out, self.shm_contrib):
+            if shm is not None:
+                shm.close()
+                shm.unlink()
+        self.shm_in = self.shm_out = self.shm_contrib = None
+        self.cap = 0
+
+    def close(self):
+        self.pool.shutdown()
+        self._release()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
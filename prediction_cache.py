@@ -0,0 +1,108 @@
+"""Bounded LRU/TTL cache of single-patient predictions.
+
+Keyed on the model version and the canonical 13-feature tuple (every value as
+a float, so 52, 52.0 and "52" are the same patient); values are
+(probability, prediction, risk, risk_factors). One cache is shared by all
+sessions/requests in a process. When a different model version shows up the
+cache is cleared, so a hot-swapped model never serves the old one's results.
+Invalid input is never cached: scoring raises before anything is stored.
+"""
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+import metrics
+import scoring
+from scoring import FEATURES
+
+# contributions: per-feature logit contributions in FEATURES order (scoring.CONTRIB),
+# () when the model can't provide them
+Prediction = namedtuple("Prediction", "probability prediction risk risk_factors contributions",
+                        defaults=((),))
+
+
+def feature_key(d):
+    try:
+        return tuple(float(d[c]) for c in FEATURES)
+    except KeyError as e:
+        raise ValueError(f"Missing column(s): {e.args[0]}")
+    except (TypeError, ValueError):
+        raise ValueError("feature values must be numeric")
+
+
+def model_version(model):
+    return getattr(model, "version", None) or id(model)
+
+
+class PredictionCache:
+    def __init__(self, max_entries=4096, ttl=3600.0):
+        self.max_entries = max_entries
+        self.ttl         = ttl
+        self.lock        = threading.Lock()
+        self.entries     = OrderedDict()     # key -> (Prediction, expires), oldest first
+        self.version     = None
+        self.hits = self.misses = self.expired = self.evictions = 0
+
+    def get_or_compute(self, version, key, compute):
+        now = time.monotonic()
+        with self.lock:
+            if version != self.version:
+                self.entries.clear()
+                self.version = version
+            hit = self.entries.get(key)
+            if hit is not None:
+                if hit[1] > now:
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    return hit[0]
+                del self.entries[key]
+                self.expired += 1
+            self.misses += 1
+        value = compute()
+        with self.lock:
+            if version == self.version:
+                self.entries[key] = (value, now + self.ttl)
+                self.entries.move_to_end(key)
+                while len(self.entries) > self.max_entries:
+                    self.entries.popitem(last=False)
+                    self.evictions += 1
+        return value
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self):
+        with self.lock:
+            n = self.hits + self.misses
+            return {"entries": len(self.entries), "hits": self.hits, "misses": self.misses,
+                    "hit_rate": round(self.hits / n, 4) if n else None,
+                    "expired": self.expired, "evictions": self.evictions,
+                    "model_version": self.version}
+
+
+_SHARED, _SHARED_LOCK = None, threading.Lock()
+
+def shared():
+    global _SHARED
+    if _SHARED is None:
+        with _SHARED_LOCK:
+            if _SHARED is None:
+                _SHARED = PredictionCache()
+    return _SHARED
+
+
+# Array-only single-patient path (scoring.score_one): no DataFrame per patient
+def _compute(d, model):
+    with metrics.span("predict.compute"):
+        r = scoring.score_one(d, model)
+    return Prediction(r['probability'], r['prediction'], r['risk'], tuple(r['risk_factors']),
+                      r['contributions'])
+
+
+# One patient dict -> Prediction, served from the shared cache when possible
+def predict(d, model=None, cache=None):
+    model = model if model is not None else scoring.get_model()
+    cache = cache if cache is not None else shared()
+    with metrics.span("predict.one"):
+        return cache.get_or_compute(model_version(model), feature_key(d), lambda: _compute(d, model))
@@ -0,0 +1,102 @@
+"""Compact patient record: the 13 features plus model outputs in 27 bytes.
+
+A NumPy structured dtype with the narrowest type that holds each validated
+field (see scoring.BOUNDS): int8/int16 features, float32 oldpeak and
+probability, risk as a uint8 code and the nine risk-factor rules as a uint16
+bitmask. Arrays of records are what session state, batch scoring and report
+generation pass around; readable frames and report arguments are derived on
+demand.
+
+    recs = records.from_frame(scoring.score_frame(X, model))
+    records.to_frame(recs)               # -> DataFrame (risk labels, rf_* flags, messages)
+    records.report_args(recs[0])         # -> kwargs for report.make_pdf_bytes
+"""
+import numpy as np
+import pandas as pd
+
+import risk_rules
+from scoring import FEATURES, HIGH_T, LOW_T, RECS, classify
+
+# Narrowest dtype that holds each feature's BOUNDS
+DTYPES = {'age':np.int8, 'sex':np.int8, 'cp':np.int8, 'trestbps':np.int16,
+          'chol':np.int16, 'fbs':np.int8, 'restecg':np.int8, 'thalach':np.int16,
+          'exang':np.int8, 'oldpeak':np.float32, 'slope':np.int8, 'ca':np.int8,
+          'thal':np.int8}
+RISKS  = np.array(["LOW", "MEDIUM", "HIGH"])
+RECORD = np.dtype([(c, DTYPES[c]) for c in FEATURES] +
+                  [("probability", np.float32), ("prediction", np.int8),
+                   ("risk", np.uint8), ("flags", np.uint16)])
+
+_BITS = (np.uint16(1) << np.arange(len(risk_rules.RULES), dtype=np.uint16))
+assert len(risk_rules.RULES) <= 16, "flags is a uint16 bitmask"
+
+
+# ── Encode ───────────────────────────────────────────────────────────────────
+# From any frame with the 13 features and `probability` (score_frame output,
+# a scored CSV); prediction/risk are derived when the frame doesn't carry them.
+# A risk label other than RISKS raises ValueError (it has no uint8 code).
+def from_frame(df):
+    recs = np.empty(len(df), dtype=RECORD)
+    for c in FEATURES:
+        recs[c] = df[c].to_numpy()
+    prob = df["probability"].to_numpy(dtype=np.float64)
+    recs["probability"] = prob
+    recs["prediction"]  = df["prediction"].to_numpy() if "prediction" in df else classify(prob)
+    if "risk" in df:
+        codes = pd.Categorical(df["risk"], categories=RISKS).codes
+        bad   = np.flatnonzero(codes < 0)
+        if len(bad):
+            labels = sorted({str(v) for v in df["risk"].to_numpy()[bad]})
+            raise ValueError(f"'risk': {len(bad)} unknown label(s) {', '.join(labels)}, expected "
+                             f"{', '.join(RISKS)} (e.g. row {', '.join(map(str, bad[:5]))})")
+        recs["risk"] = codes
+    else:
+        recs["risk"] = encode_risk(prob)
+    recs["flags"] = risk_rules.evaluate(df[FEATURES]).flags @ _BITS
+    return recs
+
+
+# Same bands as scoring.risk_band: 0 LOW, 1 MEDIUM, 2 HIGH
+def encode_risk(prob):
+    prob = np.asarray(prob)
+    return (prob >= LOW_T).astype(np.uint8) + (prob >= HIGH_T)
+
+
+def one(d, prob, pred=None, risk=None):
+    row = {**d, "probability": prob}
+    row.update({k: v for k, v in [("prediction", pred), ("risk", risk)] if v is not None})
+    return from_frame(pd.DataFrame([row]))[0]
+
+
+# ── Decode ───────────────────────────────────────────────────────────────────
+# float32 fields go through their shortest repr so 2.3 comes back as 2.3, not 2.2999999523
+def _py(v):
+    return float(str(v)) if v.dtype.kind == "f" else v.item()
+
+def features(rec):
+    return {c: _py(rec[c]) for c in FEATURES}
+
+
+def flags(recs):
+    return (np.atleast_1d(recs["flags"])[:, None] & _BITS) != 0
+
+
+def to_frame(recs, messages=True):
+    out = pd.DataFrame({c: recs[c] for c in FEATURES})
+    out["probability"] = recs["probability"]
+    out["prediction"]  = recs["prediction"]
+    out["risk"]        = RISKS[recs["risk"]]
+    rf = risk_rules.RiskFactors(out[FEATURES], flags(recs), risk_rules.RULES)
+    out[rf.names] = rf.flags.astype(np.int8)
+    out["risk_factor_count"] = rf.count
+    if messages:
+        out["risk_factors"] = rf.joined()
+    return out
+
+
+# make_pdf_bytes arguments for one record (patient/clinician fields come separately)
+def report_args(rec):
+    d    = features(rec)
+    risk = str(RISKS[rec["risk"]])
+    return dict(d=d, pred=int(rec["prediction"]), prob=_py(rec["probability"]), risk=risk,
+                rec=RECS[risk], rfs=risk_rules.factors(d))
@@ -0,0 +1,367 @@
+"""PDF risk report rendering (ReportLab). No Streamlit dependency, so reports
+can be rendered from the app, batch jobs and worker processes alike."""
+import io
+import threading
+from datetime import datetime
+from xml.sax.saxutils import escape
+
+from scoring import LOW_T, HIGH_T
+
+_ASSETS, _ASSETS_LOCK = None, threading.Lock()
+
+
+# Static flowable laid out once per frame width and replayed in every report.
+# Calling it gives a fresh wrapper for one document: flowables keep their canvas
+# while drawing, so only the shared inner flowable's wrap/draw is serialized
+# (microseconds) and reports render concurrently.
+def _static(flowable):
+    from reportlab.platypus import Flowable
+
+    class Static(Flowable):
+        def __init__(self, shared):
+            Flowable.__init__(self)
+            self.shared = shared
+            self.hAlign = getattr(shared.f, "hAlign", self.hAlign)   # Table centres, Flowable doesn't
+            self.vAlign = getattr(shared.f, "vAlign", self.vAlign)
+
+        def wrap(self, aw, ah):
+            s = self.shared
+            with s.lock:
+                if aw not in s.sizes:
+                    s.sizes[aw] = s.f.wrap(aw, ah)
+                self.width, self.height = s.sizes[aw]
+            return self.width, self.height
+
+        def draw(self):
+            with self.shared.lock:
+                self.shared.f.drawOn(self.canv, 0, 0)
+
+    class Shared:
+        def __init__(self, f):
+            self.f, self.sizes, self.lock = f, {}, threading.Lock()
+
+        def __call__(self):
+            return Static(self)
+
+    return Shared(flowable)
+
+
+# ── Per-process assets: styles, colours, table styles, static flowables ────
+class _Assets:
+    def __init__(self):
+        from reportlab.lib.pagesizes import A4
+        from reportlab.lib import colors
+        from reportlab.lib.units import mm
+        from reportlab.lib.enums import TA_LEFT, TA_CENTER, TA_RIGHT
+        from reportlab.platypus import (SimpleDocTemplate, Paragraph, Spacer,
+                                         Table, TableStyle, HRFlowable)
+        from reportlab.graphics.shapes import Rect, String, Drawing
+        self.A4, self.mm, self.colors = A4, mm, colors
+        self.TA_LEFT, self.TA_CENTER, self.TA_RIGHT = TA_LEFT, TA_CENTER, TA_RIGHT
+        self.SimpleDocTemplate, self.Paragraph, self.Spacer = SimpleDocTemplate, Paragraph, Spacer
+        self.Table, self.Rect, self.Drawing = Table, Rect, Drawing
+        self._styles = {}
+
+        H = colors.HexColor
+        self.PINK  = H("#C44569")
+        self.RC    = {"LOW":H("#27AE60"), "MEDIUM":H("#F39C12"), "HIGH":H("#E74C3C")}
+        self.RBG   = {"LOW":H("#EAFAF1"), "MEDIUM":H("#FEF9E7"), "HIGH":H("#FDEDEC")}
+        self.GREY  = H("#888888")
+        self.CARD  = H("#FAFAFA")
+        self.BORD  = H("#EEEEEE")
+        self.INK   = H("#222222")
+        self.INK2  = H("#222")
+        self.INK3  = H("#333")
+        self.PT    = H("#333333")
+        self.SUB   = H("#555555")
+        self.BODY  = H("#444444")
+        self.NEEDLE= H("#1a1a1a")
+        self.W = W = A4[0] - 30*mm
+        self.cw    = (W - 4*mm) / 2
+        P = self.P
+
+        # ── table styles ──
+        self.hdr_style = TableStyle([
+            ("BACKGROUND",   (0,0),(-1,-1), self.PINK),
+            ("VALIGN",       (0,0),(-1,-1), "MIDDLE"),
+            ("TOPPADDING",   (0,0),(-1,-1), 9),
+            ("BOTTOMPADDING",(0,0),(-1,-1), 7),
+            ("LEFTPADDING",  (0,0),(-1,-1), 10),
+            ("RIGHTPADDING", (0,0),(-1,-1), 10),
+            ("SPAN",         (0,0),(0,1)),
+        ])
+        self.pt_style = TableStyle([
+            ("BACKGROUND",   (0,0),(-1,-1), H("#F0F4FF")),
+            ("BOX",          (0,0),(-1,-1), 0.5, H("#C7D2FE")),
+            ("LEFTPADDING",  (0,0),(-1,-1), 8),
+            ("TOPPADDING",   (0,0),(-1,-1), 4),
+            ("BOTTOMPADDING",(0,0),(-1,-1), 4),
+        ])
+        self.rb_style = {r: TableStyle([
+            ("BACKGROUND",   (0,0),(-1,-1), self.RBG[r]),
+            ("BOX",          (0,0),(-1,-1), 1.0, self.RC[r]),
+            ("BACKGROUND",   (0,0),(0,0),   self.RC[r]),
+            ("VALIGN",       (0,0),(-1,-1), "MIDDLE"),
+            ("LINEAFTER",    (1,0),(1,0),   0.5, self.RC[r]),
+            ("LEFTPADDING",  (0,0),(-1,-1), 8),
+            ("RIGHTPADDING", (0,0),(-1,-1), 8),
+            ("TOPPADDING",   (0,0),(-1,-1), 8),
+            ("BOTTOMPADDING",(0,0),(-1,-1), 8),
+        ]) for r in self.RC}
+        self.card_inner_style = TableStyle([
+            ("LINEBELOW",    (0,0),(-1,-2), 0.3, H("#F0F0F0")),
+            ("TOPPADDING",   (0,0),(-1,-1), 2),
+            ("BOTTOMPADDING",(0,0),(-1,-1), 2),
+            ("LEFTPADDING",  (0,0),(-1,-1), 0),
+            ("RIGHTPADDING", (0,0),(-1,-1), 0),
+        ])
+        self.card_outer_style = TableStyle([
+            ("BACKGROUND",   (0,0),(-1,-1), self.CARD),
+            ("BOX",          (0,0),(-1,-1), 0.5, self.BORD),
+            ("LINEBELOW",    (0,0),(0,0),   0.5, H("#F0E0E5")),
+            ("LEFTPADDING",  (0,0),(-1,-1), 8),
+            ("RIGHTPADDING", (0,0),(-1,-1), 8),
+            ("TOPPADDING",   (0,0),(-1,-1), 5),
+            ("BOTTOMPADDING",(0,0),(-1,-1), 5),
+        ])
+        self.row_style = TableStyle([
+            ("LEFTPADDING",(0,0),(-1,-1),2),("RIGHTPADDING",(0,0),(-1,-1),2),
+            ("VALIGN",(0,0),(-1,-1),"TOP")])
+        self.rf_inner_style = TableStyle([
+            ("TOPPADDING",(0,0),(-1,-1),1),("BOTTOMPADDING",(0,0),(-1,-1),1),
+            ("LEFTPADDING",(0,0),(-1,-1),0)])
+        self.rf_card_style = TableStyle([
+            ("BACKGROUND",(0,0),(-1,-1),self.CARD),("BOX",(0,0),(-1,-1),0.5,self.BORD),
+            ("LINEBELOW",(0,0),(0,0),0.5,H("#F0E0E5")),
+            ("LEFTPADDING",(0,0),(-1,-1),8),("RIGHTPADDING",(0,0),(-1,-1),8),
+            ("TOPPADDING",(0,0),(-1,-1),5),("BOTTOMPADDING",(0,0),(-1,-1),5)])
+        self.nt_style = TableStyle([
+            ("BACKGROUND",(0,0),(-1,-1),H("#FFF8E7")),
+            ("BOX",(0,0),(-1,-1),0.8,H("#F39C12")),
+            ("LINEBELOW",(0,0),(0,0),0.5,H("#F39C12")),
+            ("LEFTPADDING",(0,0),(-1,-1),10),("RIGHTPADDING",(0,0),(-1,-1),10),
+            ("TOPPADDING",(0,0),(-1,-1),6),("BOTTOMPADDING",(0,0),(-1,-1),6)])
+
+        # ── static flowables ──
+        self.hdr_title = _static(P("❤️  Heart Disease Risk Assessment Report", 15, colors.white, True))
+        self.hdr_sub   = _static(P("Logistic Regression · ROC-AUC: 0.9058 · UCI Heart Disease Dataset",
+                                   8, colors.white))
+        disc = Table([[P("⚠  DISCLAIMER: This is an educational ML tool only. It does not "
+                         "constitute medical advice, diagnosis, or treatment. Always consult "
+                         "a qualified healthcare professional.", 8,
+                         H("#856404"))]], colWidths=[W])
+        disc.setStyle(TableStyle([
+            ("BACKGROUND",   (0,0),(-1,-1), H("#FFF3CD")),
+            ("BOX",          (0,0),(-1,-1), 0.5, H("#FFEEBA")),
+            ("LEFTPADDING",  (0,0),(-1,-1), 8),
+            ("RIGHTPADDING", (0,0),(-1,-1), 8),
+            ("TOPPADDING",   (0,0),(-1,-1), 5),
+            ("BOTTOMPADDING",(0,0),(-1,-1), 5),
+        ]))
+        self.disc       = _static(disc)
+        self.gauge_head = _static(P("RISK PROBABILITY GAUGE", 7, self.GREY, True))
+        gw, gh = W, 10
+        self.gauge_static = [
+            Rect(0,    14, gw*LOW_T, gh, fillColor=H("#27AE60"), strokeColor=None),
+            Rect(gw*LOW_T, 14, gw*(HIGH_T-LOW_T), gh, fillColor=H("#F39C12"), strokeColor=None),
+            Rect(gw*HIGH_T, 14, gw*(1-HIGH_T), gh, fillColor=H("#E74C3C"), strokeColor=None)]
+        self.gauge_labels = [String(gw*pct, 2, lbl, fontSize=7, fillColor=H("#999999"),
+                                    textAnchor="middle")
+                             for pct, lbl in [(0,"0%"),(0.25,"25%"),(0.50,"50%"),(0.75,"75%"),(1.0,"100%")]]
+        self.no_rf    = _static(P("✓  No major risk factors identified", 9, H("#27AE60"), True))
+        self.rf_title = _static(P("⚠️  RISK FACTORS IDENTIFIED", 8, self.PINK, True))
+        self.nt_title = _static(P("📝  CLINICIAN NOTES", 8, H("#E67E22"), True))
+        self.ct_title = _static(P("📊  WHAT DRIVES THIS ESTIMATE  ·  model contributions vs. an average patient",
+                                  8, self.PINK, True))
+        ft = Table([[
+            P("Heart Disease Prediction System · Logistic Regression · "
+              "UCI (n=302) · 5-Fold CV · Acc: 83.6% · Recall: 84.9%",
+              7.5, self.GREY),
+            P("Logistic Regression · Acc: 83.61% · Recall: 84.85% · F1: 84.85% · ROC-AUC: 0.9058",
+              7.5, self.GREY, align=TA_RIGHT)
+        ]], colWidths=[W*0.55, W*0.45])
+        ft.setStyle(TableStyle([
+            ("VALIGN",(0,0),(-1,-1),"MIDDLE"),
+            ("LEFTPADDING",(0,0),(-1,-1),0),("RIGHTPADDING",(0,0),(-1,-1),0),
+            ("TOPPADDING",(0,0),(-1,-1),0),("BOTTOMPADDING",(0,0),(-1,-1),0)]))
+        self.ft = _static(ft)
+        self.HRFlowable = HRFlowable
+
+    # Per-document flowables around the shared static parts
+    def disclaimer(self):
+        return [self.disc(), self.Spacer(1, 3*self.mm)]
+
+    def footer(self):
+        return [self.Spacer(1, 4*self.mm), self.HRFlowable(width=self.W, thickness=0.5, color=self.BORD),
+                self.Spacer(1, 1*self.mm), self.ft()]
+
+    def P(self, text, size=9, color=None, bold=False, align=None, leading=None):
+        from reportlab.lib.styles import ParagraphStyle
+        color = self.INK if color is None else color
+        align = self.TA_LEFT if align is None else align
+        key   = (size, color.rgba(), bold, align, leading)
+        st    = self._styles.get(key)
+        if st is None:
+            st = self._styles[key] = ParagraphStyle("p",
+                fontSize=size, textColor=color,
+                fontName="Helvetica-Bold" if bold else "Helvetica",
+                alignment=align, leading=leading or size*1.35)
+        return self.Paragraph(str(text), st)
+
+
+def _assets():
+    global _ASSETS
+    if _ASSETS is None:
+        with _ASSETS_LOCK:
+            if _ASSETS is None:
+                _ASSETS = _Assets()
+    return _ASSETS
+
+
+# Import ReportLab and build the assets ahead of the first report
+def warm():
+    _assets()
+
+
+# ── PDF generator using ReportLab (true .pdf, no HTML) ──────────────────────
+# `top`: attribution.top(...) rows — the model's largest per-feature contributions
+def make_pdf_bytes(d, pred, prob, risk, rec, rfs, notes, pname, pdob, pref, top=()):
+    A = _assets()
+    P, Table, Spacer, mm, W = A.P, A.Table, A.Spacer, A.mm, A.W
+    colors, RC, GREY = A.colors, A.RC[risk], A.GREY
+
+    buf = io.BytesIO()
+    doc = A.SimpleDocTemplate(buf, pagesize=A.A4,
+                               leftMargin=15*mm, rightMargin=15*mm,
+                               topMargin=12*mm, bottomMargin=12*mm)
+    story = []
+
+    # ── HEADER ──
+    hdr = Table([[
+        A.hdr_title(),
+        P(f"ID: HDR-{datetime.now().strftime('%Y%m%d%H%M%S')}<br/>"
+          f"{datetime.now().strftime('%d %B %Y, %H:%M')}<br/>"
+          "EDUCATIONAL USE ONLY", 7.5, colors.white, align=A.TA_RIGHT)
+    ],[
+        A.hdr_sub(),
+        ""
+    ]], colWidths=[W*0.65, W*0.35])
+    hdr.setStyle(A.hdr_style)
+    story += [hdr, Spacer(1, 4*mm)]
+
+    # ── DISCLAIMER ──
+    story += A.disclaimer()
+
+    # Free text goes into Paragraph markup: '<b>' in a note must print, not parse
+    notes, pname, pdob, pref = (escape(str(v)) for v in (notes, pname, pdob, pref))
+
+    # ── PATIENT ROW ──
+    pt_parts = []
+    if pname: pt_parts.append(f"<b>Patient:</b> {pname}")
+    if pdob:  pt_parts.append(f"<b>DOB:</b> {pdob}")
+    if pref:  pt_parts.append(f"<b>Clinician:</b> {pref}")
+    if pt_parts:
+        pt = Table([[P("  |  ".join(pt_parts), 9, A.PT)]], colWidths=[W])
+        pt.setStyle(A.pt_style)
+        story += [pt, Spacer(1, 3*mm)]
+
+    # ── RISK BANNER ──
+    ri = {"LOW":"✓","MEDIUM":"!","HIGH":"⚠"}[risk]
+    rb = Table([[
+        P(ri, 16, colors.white, True, A.TA_CENTER),
+        [P(f"{risk} RISK", 14, RC, True),
+         P(f"Disease probability: <b>{prob*100:.1f}%</b>  |  "
+           f"{'Heart Disease Detected' if pred==1 else 'No Heart Disease Detected'}",
+           9, A.SUB)],
+        [P("📋  RECOMMENDATION", 8, RC, True),
+         Spacer(1, 2),
+         P(rec, 9, A.BODY)]
+    ]], colWidths=[11*mm, W*0.53, W*0.35])
+    rb.setStyle(A.rb_style[risk])
+    story += [rb, Spacer(1, 3*mm)]
+
+    # ── GAUGE ──
+    story += [A.gauge_head(), Spacer(1, 1*mm)]
+    gw, gh = W, 10
+    g = A.Drawing(gw, gh + 14)
+    for s in A.gauge_static:
+        g.add(s.copy())                  # the renderer marks shapes while drawing them
+    nx = gw * min(max(prob, 0.01), 0.99)
+    g.add(A.Rect(nx-1.5, 11, 3, gh+5, fillColor=A.NEEDLE, strokeColor=None))
+    for s in A.gauge_labels:
+        g.add(s.copy())
+    story += [g, Spacer(1, 3*mm)]
+
+    # ── DATA CARDS helper ──
+    def card(title, rows):
+        inner = Table([[P(k, 9, GREY), P(v, 9, A.INK2, True)]
+                        for k,v in rows], colWidths=[W*0.22, W*0.25])
+        inner.setStyle(A.card_inner_style)
+        outer = Table([[P(title, 8, A.PINK, True)],[inner]], colWidths=[None])
+        outer.setStyle(A.card_outer_style)
+        return outer
+
+    sex_s = "Male" if d["sex"]==1 else "Female"
+    cp_s  = ["Typical Angina","Atypical Angina","Non-anginal Pain","Asymptomatic"][d["cp"]]
+    ecg_s = ["Normal","ST-T Abnormality","LV Hypertrophy"][d["restecg"]]
+    sl_s  = ["Upsloping","Flat","Downsloping"][d["slope"]]
+    th_s  = ["Normal","Fixed Defect","Reversible Defect","Unknown"][d["thal"]]
+    fbs_s = "Yes" if d["fbs"]==1 else "No"
+    ex_s  = "Yes" if d["exang"]==1 else "No"
+    cw = A.cw
+
+    row1 = Table([[
+        card("👤  DEMOGRAPHICS & VITALS", [
+            ("Age",f"{d['age']} years"),("Sex",sex_s),
+            ("Resting BP",f"{d['trestbps']} mm Hg"),
+            ("Cholesterol",f"{d['chol']} mg/dL"),
+            ("Max Heart Rate",f"{d['thalach']} bpm")]),
+        card("🏥  BLOOD & ECG", [
+            ("Fasting Sugar >120",fbs_s),("Resting ECG",ecg_s),
+            ("ST Depression",str(d['oldpeak'])),("ST Slope",sl_s)])
+    ]], colWidths=[cw, cw])
+    row1.setStyle(A.row_style)
+    story += [row1, Spacer(1, 2*mm)]
+
+    rf_items = [P(f"⚠  {r}", 9, A.INK3) for r in rfs] if rfs else [A.no_rf()]
+    rf_inner = Table([[item] for item in rf_items], colWidths=[None])
+    rf_inner.setStyle(A.rf_inner_style)
+    rf_card = Table([[A.rf_title()], [rf_inner]], colWidths=[None])
+    rf_card.setStyle(A.rf_card_style)
+
+    row2 = Table([[
+        card("💊  CLINICAL FINDINGS", [
+            ("Chest Pain",cp_s),("Exercise Angina",ex_s),
+            ("Major Vessels",str(d['ca'])),("Thalassemia",th_s)]),
+        rf_card
+    ]], colWidths=[cw, cw])
+    row2.setStyle(A.row_style)
+    story.append(row2)
+
+    # ── MODEL CONTRIBUTORS ──
+    if top:
+        inner = Table([[P(c.label, 9, GREY), P(c.value, 9, A.INK2, True),
+                        P("raises risk" if c.logit > 0 else "lowers risk", 9,
+                          A.RC["HIGH"] if c.logit > 0 else A.RC["LOW"], True),
+                        P(f"odds ×{c.odds:.2f}", 9, A.BODY, align=A.TA_RIGHT)]
+                       for c in top], colWidths=[W*0.28, W*0.34, W*0.18, None])
+        inner.setStyle(A.card_inner_style)
+        ct = Table([[A.ct_title()], [inner]], colWidths=[W])
+        ct.setStyle(A.card_outer_style)
+        story += [Spacer(1, 3*mm), ct]
+
+    # ── CLINICIAN NOTES ──
+    if notes.strip():
+        story.append(Spacer(1, 3*mm))
+        nt = Table([
+            [A.nt_title()],
+            [P(notes.replace('\n','<br/>'), 9, A.BODY, leading=13)]
+        ], colWidths=[W])
+        nt.setStyle(A.nt_style)
+        story.append(nt)
+
+    # ── FOOTER ──
+    story += A.footer()
+
+    doc.build(story)
+    return buf.getvalue()
@@ -0,0 +1,93 @@
+"""Size-bounded LRU cache for generated PDF report bytes.
+
+Reports are keyed on a hash of everything that appears in them (inputs,
+probability, notes, patient fields), so Streamlit reruns that don't change the
+report reuse the cached bytes instead of rebuilding the ReportLab document.
+Each session pins at most one entry: when a session's report changes, or the
+session ends (`evict_session`, called by the app on teardown), its entry is
+released (and dropped once no other session uses it).
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+def report_key(*parts):
+    return hashlib.sha256(repr(parts).encode("utf-8")).hexdigest()
+
+
+class ReportCache:
+    def __init__(self, max_entries=64, max_bytes=32 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes   = max_bytes
+        self.lock        = threading.Lock()
+        self.entries     = OrderedDict()     # key -> bytes, oldest first
+        self.owners      = {}                # key -> set(session ids)
+        self.by_session  = {}                # session id -> key
+        self.nbytes      = 0
+        self.hits = self.misses = self.evictions = 0
+
+    # Cached bytes (pinned to `session`) or None; a miss is not counted here
+    def get(self, key, session=None):
+        with self.lock:
+            data = self.entries.get(key)
+            if data is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                self._pin(key, session)
+            return data
+
+    def get_or_build(self, key, build, session=None):
+        data = self.get(key, session)
+        if data is not None:
+            return data
+        with self.lock:
+            self.misses += 1
+        data = build()
+        with self.lock:
+            if key not in self.entries:
+                self.entries[key] = data
+                self.nbytes += len(data)
+            self._pin(key, session)
+            self._trim()
+        return data
+
+    def evict_session(self, session):
+        with self.lock:
+            self._release(session)
+
+    def stats(self):
+        with self.lock:
+            return {"entries": len(self.entries), "bytes": self.nbytes, "hits": self.hits,
+                    "misses": self.misses, "evictions": self.evictions}
+
+    # ── internals (lock held) ──
+    def _pin(self, key, session):
+        if session is None or self.by_session.get(session) == key:
+            return
+        self._release(session)
+        self.by_session[session] = key
+        self.owners.setdefault(key, set()).add(session)
+
+    def _release(self, session):
+        old = self.by_session.pop(session, None)
+        if old is None:
+            return
+        owners = self.owners.get(old)
+        if owners is not None:
+            owners.discard(session)
+            if not owners:
+                del self.owners[old]
+                self._drop(old)
+
+    def _drop(self, key):
+        data = self.entries.pop(key, None)
+        if data is not None:
+            self.nbytes -= len(data)
+            self.evictions += 1
+            for s in self.owners.pop(key, ()):
+                self.by_session.pop(s, None)
+
+    def _trim(self):
+        while self.entries and (len(self.entries) > self.max_entries or self.nbytes > self.max_bytes):
+            self._drop(next(iter(self.entries)))
@@ -0,0 +1,84 @@
+"""Background PDF rendering for the Streamlit app.
+
+`submit` returns a Future for the report bytes right away: already resolved on
+a ReportCache hit, otherwise queued on a small thread pool. Concurrent
+submits of the same report share one job. The page shows the results first
+and turns the download button on once the Future resolves.
+
+Instrumented: jobs queued/running, time spent waiting in the queue and
+rendering (p50/p95/max over the last 1000 jobs), completions and failures.
+The same numbers go to metrics.py: "report_jobs.wait" and "report_jobs.render"
+spans and "report_jobs.queued"/"report_jobs.running" gauges, exported on
+/metrics with the other spans.
+"""
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import numpy as np
+
+import metrics
+
+
+class ReportJobs:
+    def __init__(self, cache, workers=2, window=1000):
+        self.cache    = cache
+        self.pool     = ThreadPoolExecutor(workers, thread_name_prefix="pdf-render")
+        self.lock     = threading.Lock()
+        self.inflight = {}                   # key -> Future
+        self.queued   = self.running = 0
+        self.done = self.failed = self.cache_hits = 0
+        self.wait_ms  = deque(maxlen=window)
+        self.build_ms = deque(maxlen=window)
+        metrics.gauge("report_jobs.queued",  lambda: self.queued)
+        metrics.gauge("report_jobs.running", lambda: self.running)
+
+    def submit(self, key, build, session=None):
+        data = self.cache.get(key, session)
+        if data is not None:
+            with self.lock:
+                self.cache_hits += 1
+            f = Future()
+            f.set_result(data)
+            return f
+        with self.lock:
+            f = self.inflight.get(key)
+            if f is None:
+                self.queued += 1
+                f = self.pool.submit(self._run, key, build, session, time.perf_counter())
+                self.inflight[key] = f
+            return f
+
+    def _run(self, key, build, session, t_submit):
+        t0 = time.perf_counter()
+        with self.lock:
+            self.queued  -= 1
+            self.running += 1
+            self.wait_ms.append((t0 - t_submit) * 1e3)
+        metrics.observe("report_jobs.wait", t0 - t_submit)
+        ok = False
+        try:
+            data = self.cache.get_or_build(key, build, session)
+            ok = True
+            return data
+        finally:
+            with self.lock:
+                self.running -= 1
+                self.inflight.pop(key, None)
+                if ok:
+                    self.done += 1
+                    self.build_ms.append((time.perf_counter() - t0) * 1e3)
+                else:
+                    self.failed += 1
+            metrics.observe("report_jobs.render", time.perf_counter() - t0)
+
+    def stats(self):
+        def pct(xs):
+            a = np.array(xs)
+            return {"p50": round(float(np.percentile(a, 50)), 2), "p95": round(float(np.percentile(a, 95)), 2),
+                    "max": round(float(a.max()), 2)} if len(a) else None
+        with self.lock:
+            return {"queued": self.queued, "running": self.running, "completed": self.done,
+                    "failed": self.failed, "cache_hits": self.cache_hits,
+                    "queue_wait_ms": pct(self.wait_ms), "render_ms": pct(self.build_ms)}
@@ -0,0 +1,85 @@
+"""Declarative risk-factor rules.
+
+Each rule is (name, feature, operator, threshold, message template). The same
+table is evaluated per patient (`factors(d)`) or as column operations over a
+whole frame (`evaluate(X)`), which returns a boolean flag matrix and formats
+messages only when they are asked for.
+
+Templates use plain `{feature}` placeholders.
+"""
+import operator
+import string
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+Rule = namedtuple("Rule", "name feature op threshold template")
+
+OPS = {">": operator.gt, ">=": operator.ge, "<": operator.lt,
+       "<=": operator.le, "==": operator.eq, "!=": operator.ne}
+
+RULES = (
+    Rule("rf_age",     "age",      ">",  55,  "Age {age} yrs — elevated risk >55"),
+    Rule("rf_chol",    "chol",     ">",  240, "Cholesterol {chol} mg/dL — high"),
+    Rule("rf_bp",      "trestbps", ">",  140, "BP {trestbps} mmHg — hypertensive"),
+    Rule("rf_fbs",     "fbs",      "==", 1,   "Fasting blood sugar >120 mg/dL"),
+    Rule("rf_exang",   "exang",    "==", 1,   "Exercise-induced angina present"),
+    Rule("rf_oldpeak", "oldpeak",  ">",  2,   "ST depression {oldpeak} — significant"),
+    Rule("rf_ca",      "ca",       ">",  0,   "{ca} major vessel(s) blocked"),
+    Rule("rf_thal",    "thal",     "==", 2,   "Reversible thalassemia defect"),
+    Rule("rf_cp",      "cp",       "==", 0,   "Typical angina — classic cardiac"),
+)
+NAMES = [r.name for r in RULES]
+
+
+# ── Per patient ──────────────────────────────────────────────────────────────
+def factors(d, rules=RULES):
+    return [r.template.format_map(d) for r in rules if OPS[r.op](d[r.feature], r.threshold)]
+
+
+# ── Whole frame ──────────────────────────────────────────────────────────────
+def _fields(template):
+    return [(lit, f) for lit, f, _, _ in string.Formatter().parse(template)]
+
+
+class RiskFactors:
+    def __init__(self, X, flags, rules):
+        self.X, self.flags, self.rules = X, flags, rules
+
+    @property
+    def names(self):
+        return [r.name for r in self.rules]
+
+    @property
+    def count(self):
+        return self.flags.sum(axis=1)
+
+    def frame(self):
+        return pd.DataFrame(self.flags.astype(np.int8), columns=self.names)
+
+    # Messages for one row, formatted on demand
+    def messages(self, i):
+        return [r.template.format_map({f: self.X[f].iloc[i] for _, f in _fields(r.template) if f})
+                for j, r in enumerate(self.rules) if self.flags[i, j]]
+
+    # All rows joined with `sep`; each rule formats only the rows it flags
+    def joined(self, sep="; "):
+        out = np.full(len(self.flags), "", dtype=object)
+        for j, r in enumerate(self.rules):
+            idx = np.flatnonzero(self.flags[:, j])
+            if not len(idx):
+                continue
+            msg = np.full(len(idx), "", dtype=object)
+            for lit, field in _fields(r.template):
+                msg = msg + lit
+                if field:
+                    msg = msg + self.X[field].iloc[idx].astype(str).to_numpy(dtype=object)
+            prev = out[idx]
+            out[idx] = np.where(prev == "", msg, prev + sep + msg)
+        return out
+
+
+def evaluate(X, rules=RULES):
+    flags = np.column_stack([OPS[r.op](X[r.feature].to_numpy(), r.threshold) for r in rules])
+    return RiskFactors(X, flags, rules)
@@ -0,0 +1,178 @@
+"""Headless scoring engine for the heart disease model.
+
+Importable without streamlit/plotly so batch jobs, services and benchmarks can
+score patients directly:
+
+    from scoring import score
+    score({'age':52,'sex':1,'cp':0,...})        # -> DataFrame, one row per record
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+import metrics
+import risk_rules
+
+MODEL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                          "heart_disease_model.joblib")
+
+# ── Schema ───────────────────────────────────────────────────────────────────
+FEATURES = ['age','sex','cp','trestbps','chol','fbs','restecg',
+            'thalach','exang','oldpeak','slope','ca','thal']
+CONTRIB  = [f'contrib_{c}' for c in FEATURES]      # per-feature logit contributions
+# Same bounds as the input widgets in heart_Disease.py
+BOUNDS   = {'age':(1,120),'sex':(0,1),'cp':(0,3),'trestbps':(50,250),
+            'chol':(50,600),'fbs':(0,1),'restecg':(0,2),'thalach':(50,250),
+            'exang':(0,1),'oldpeak':(0.0,10.0),'slope':(0,2),'ca':(0,4),
+            'thal':(0,3)}
+
+# ── Risk bands ───────────────────────────────────────────────────────────────
+# Labels and bands are derived from one predict_proba pass; CLASS_T=0.5 matches
+# LogisticRegression.predict (decision_function > 0).
+LOW_T, HIGH_T, CLASS_T = 0.3, 0.7, 0.5
+RECS = {"LOW":"Maintain healthy lifestyle & annual check-ups.",
+        "MEDIUM":"Schedule GP appointment within 4 weeks.",
+        "HIGH":"Seek urgent cardiology referral immediately."}
+
+def risk_band(prob, low=LOW_T, high=HIGH_T):
+    if np.ndim(prob):
+        return np.select([prob < low, prob < high], ["LOW", "MEDIUM"], "HIGH")
+    return "LOW" if prob<low else "MEDIUM" if prob<high else "HIGH"
+
+def classify(prob, threshold=CLASS_T):
+    if np.ndim(prob):
+        return (np.asarray(prob) > threshold).astype(np.int8)
+    return int(prob > threshold)
+
+def risk_factors(d):
+    return risk_rules.factors(d)
+
+# ── Model ────────────────────────────────────────────────────────────────────
+def load_model(path=MODEL_PATH):
+    import joblib
+    return joblib.load(path)
+
+# Active version from the model store (models/CURRENT), shared by every caller in
+# the process and hot-swapped when a new version is activated. Raises
+# model_store.ModelStoreError if no valid version can be loaded.
+def get_model():
+    import model_store
+    return model_store.registry().get()
+
+# ── Validation ───────────────────────────────────────────────────────────────
+def to_frame(records):
+    if isinstance(records, pd.DataFrame):
+        return records
+    if isinstance(records, dict):
+        records = [records]
+    return pd.DataFrame(list(records))
+
+_LO  = np.array([BOUNDS[c][0] for c in FEATURES], dtype=np.float64)
+_HI  = np.array([BOUNDS[c][1] for c in FEATURES], dtype=np.float64)
+_INT = np.array([c != 'oldpeak' for c in FEATURES])
+
+# Returns (clean_df, errors); bad rows are reported, never dropped silently.
+# All 13 columns are checked in one array pass (this sits on every request path).
+# first_line is the CSV line of df's first row (chunked readers pass their offset);
+# JSON callers pass first_line=0, label="record" to point at list indexes instead.
+def validate(df, first_line=2, label="CSV line"):
+    missing = [c for c in FEATURES if c not in df.columns]
+    if missing:
+        return None, [f"Missing column(s): {', '.join(missing)}"]
+    try:
+        A = df[FEATURES].to_numpy(dtype=np.float64)
+    except (TypeError, ValueError):
+        A = df[FEATURES].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=np.float64)
+    flags = [j for j, c in enumerate(FEATURES) if df[c].dtype == bool]
+    if flags:                                 # True is not a measurement of 1
+        A[:, flags] = np.nan
+    errs = _errors(A, first_line, label)
+    if errs:
+        return None, errs
+    X = pd.DataFrame({c: A[:, j] if c == 'oldpeak' else A[:, j].astype(np.int64)
+                      for j, c in enumerate(FEATURES)})
+    return X, []
+
+def _errors(A, first_line, label):
+    with np.errstate(invalid="ignore"):
+        bad = np.isnan(A) | (A < _LO) | (A > _HI) | (_INT & (A % 1 != 0))
+    errs = []
+    if bad.any():
+        for j in np.flatnonzero(bad.any(axis=0)):
+            c, (lo, hi) = FEATURES[j], BOUNDS[FEATURES[j]]
+            rows = (np.flatnonzero(bad[:, j])[:5] + first_line).tolist()
+            errs.append(f"'{c}': {int(bad[:, j].sum())} invalid value(s), expected "
+                        f"{lo}–{hi} (e.g. {label} {', '.join(map(str, rows))})")
+    return errs
+
+# One patient dict -> 1x13 float64 array, with validate()'s checks and messages
+def one_array(d, label="record"):
+    missing = [c for c in FEATURES if c not in d]
+    if missing:
+        raise ValueError(f"Missing column(s): {', '.join(missing)}")
+    A = np.empty((1, len(FEATURES)))
+    for j, c in enumerate(FEATURES):
+        try:
+            A[0, j] = np.nan if isinstance(d[c], bool) else float(d[c])
+        except (TypeError, ValueError):
+            A[0, j] = np.nan
+    errs = _errors(A, 0, label)
+    if errs:
+        raise ValueError("; ".join(errs))
+    return A
+
+# ── Scoring ──────────────────────────────────────────────────────────────────
+# One predict_proba call for the whole frame; no per-row Python loop.
+# messages=False skips the risk-factor text column (flags are always returned).
+# contributions=True adds CONTRIB columns from the same pass as the probability
+# (models with `explain`, i.e. fastpath/model store; others score without them)
+def score_frame(X, model, extra=None, low=LOW_T, high=HIGH_T, threshold=CLASS_T, messages=True,
+                contributions=False):
+    contrib = None
+    if contributions and hasattr(model, "explain"):
+        with metrics.span("score.explain"):
+            logit, contrib = model.explain(X)
+            prob = 1.0 / (1.0 + np.exp(-logit))
+    else:
+        with metrics.span("score.predict_proba"):
+            prob = model.predict_proba(X)[:, 1]
+    out  = extra.reset_index(drop=True).copy() if extra is not None else pd.DataFrame()
+    out[FEATURES] = X.reset_index(drop=True)
+    out['probability'] = prob
+    out['prediction']  = classify(prob, threshold)
+    out['risk']        = risk_band(prob, low, high)
+    with metrics.span("score.risk_rules"):
+        rf = risk_rules.evaluate(X)
+        out[rf.names] = rf.flags.astype(np.int8)
+        out['risk_factor_count'] = rf.count
+        if messages:
+            out['risk_factors'] = rf.joined()
+    if contrib is not None:
+        out[CONTRIB] = contrib
+    return out
+
+# Single patient without a DataFrame: bounds check, one explain() on the 1x13
+# array, risk rules on the dict. Same numbers as score() for that patient.
+# -> dict(probability, prediction, risk, risk_factors, contributions); the
+# contributions are () for models without `explain`.
+def score_one(d, model=None, low=LOW_T, high=HIGH_T, threshold=CLASS_T):
+    A     = one_array(d)
+    model = model if model is not None else get_model()
+    if hasattr(model, "explain"):
+        logit, C = model.explain(A)
+        prob, contrib = float(1.0 / (1.0 + np.exp(-logit[0]))), tuple(C[0].tolist())
+    else:
+        prob, contrib = float(model.predict_proba(pd.DataFrame(A, columns=FEATURES))[0, 1]), ()
+    v = {c: float(x) if c == 'oldpeak' else int(x) for c, x in zip(FEATURES, A[0])}
+    return {"probability": prob, "prediction": classify(prob, threshold),
+            "risk": risk_band(prob, low, high), "risk_factors": risk_rules.factors(v),
+            "contributions": contrib}
+
+def score(records, model=None, **options):
+    df = to_frame(records)
+    X, errs = validate(df)
+    if errs:
+        raise ValueError("; ".join(errs))
+    return score_frame(X, model if model is not None else get_model(),
+                       extra=df.drop(columns=FEATURES), **options)
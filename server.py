@@ -0,0 +1,345 @@
+"""Local HTTP inference service for the heart disease model.
+
+Stdlib only (no outside services). Concurrent requests are gathered into
+micro-batches so each batch is scored with a single predict_proba call; a
+single patient on the model store's FastModel is scored directly on the
+request thread (scoring.score_one), which is faster than any batch wait.
+
+    python server.py --port 8000 --max-batch 64 --max-wait-ms 5
+    python server.py --model heart_disease_model.joblib [--fast]   # pin one joblib file
+    python server.py --audit [heart_audit.db]    # append every prediction to the audit log
+
+By default the active version of the model store (models/) is served and a
+newly activated version is picked up without a restart.
+
+    POST /predict   {...one patient...}            -> {...result...}
+                    (an optional "patient_ref" field is kept in the audit log)
+                    [{...}, {...}] or {"records": [...]}  -> list / {"results": [...]}
+    GET  /stats     p50/p99 latency, throughput, batch sizes, prediction cache hits, audit log
+    GET  /health    status and model version
+    GET  /metrics   per-stage timing histograms, Prometheus text (/metrics.json: JSON)
+                    recorded with --metrics or HEART_METRICS=1 (see metrics.py)
+"""
+import argparse
+import json
+import queue
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+
+import audit_log
+import metrics
+import model_store
+import prediction_cache
+import scoring
+
+OUT_COLS = ['probability', 'prediction', 'risk', 'risk_factors']
+
+
+# Feature values must be JSON numbers: true would score as 1 and "52" as 52.
+# Missing features and out-of-range numbers are left to scoring's validation.
+def _check_types(records):
+    errs = []
+    for c in scoring.FEATURES:
+        bad = [i for i, r in enumerate(records)
+               if c in r and (isinstance(r[c], bool) or not isinstance(r[c], (int, float)))]
+        if bad:
+            errs.append(f"'{c}': {len(bad)} non-numeric value(s) "
+                        f"(e.g. record {', '.join(map(str, bad[:5]))})")
+    if errs:
+        raise ValueError("; ".join(errs))
+
+
+# ── Micro-batching ───────────────────────────────────────────────────────────
+class _Pending:
+    __slots__ = ("X", "event", "result", "error")
+
+    def __init__(self, X):
+        self.X, self.event, self.result, self.error = X, threading.Event(), None, None
+
+
+# `model` is a fitted model or a model_store.Registry (resolved once per batch,
+# so a hot swap never splits a batch across two versions)
+class MicroBatcher:
+    def __init__(self, model, max_batch=64, max_wait_ms=5.0):
+        self.model     = model
+        self.max_batch = max_batch
+        self.max_wait  = max_wait_ms / 1000.0
+        self.q         = queue.Queue()
+        self.batches   = 0
+        self.rows      = 0
+        threading.Thread(target=self._loop, name="micro-batcher", daemon=True).start()
+
+    def current_model(self):
+        if isinstance(self.model, model_store.Registry):
+            return self.model.get()
+        return self.model
+
+    # Blocks the calling (request) thread until its rows have been scored
+    def submit(self, X):
+        p = _Pending(X)
+        self.q.put(p)
+        p.event.wait()
+        if p.error is not None:
+            raise p.error
+        return p.result
+
+    def _loop(self):
+        while True:
+            batch = [self.q.get()]
+            n, deadline = len(batch[0].X), time.perf_counter() + self.max_wait
+            while n < self.max_batch:
+                left = deadline - time.perf_counter()
+                if left <= 0:
+                    break
+                try:
+                    p = self.q.get(timeout=left)
+                except queue.Empty:
+                    break
+                batch.append(p)
+                n += len(p.X)
+            self._run(batch)
+
+    def _run(self, batch):
+        try:
+            with metrics.span("server.batch"):
+                X   = pd.concat([p.X for p in batch], ignore_index=True)
+                res = scoring.score_frame(X, self.current_model())[OUT_COLS]
+            self.batches += 1
+            self.rows    += len(X)
+            i = 0
+            for p in batch:
+                p.result = res.iloc[i:i + len(p.X)]
+                i += len(p.X)
+        except Exception as e:
+            for p in batch:
+                p.error = e
+        for p in batch:
+            p.event.set()
+
+
+# ── Latency / throughput stats ───────────────────────────────────────────────
+class Stats:
+    def __init__(self, window=10000):
+        self.lock     = threading.Lock()
+        self.lat      = deque(maxlen=window)
+        self.requests = 0
+        self.records  = 0
+        self.errors   = 0
+        self.started  = time.time()
+
+    def add(self, seconds, records):
+        with self.lock:
+            self.lat.append(seconds)
+            self.requests += 1
+            self.records  += records
+
+    def error(self):
+        with self.lock:
+            self.errors += 1
+
+    def snapshot(self, batcher=None):
+        with self.lock:
+            lat = np.array(self.lat) * 1000.0
+            up  = max(time.time() - self.started, 1e-9)
+            s = {"uptime_s":      round(up, 1),
+                 "requests":      self.requests,
+                 "records":       self.records,
+                 "errors":        self.errors,
+                 "req_per_s":     round(self.requests / up, 2),
+                 "records_per_s": round(self.records / up, 2),
+                 "latency_ms":    {"p50": round(float(np.percentile(lat, 50)), 3) if len(lat) else None,
+                                   "p99": round(float(np.percentile(lat, 99)), 3) if len(lat) else None,
+                                   "window": len(lat)}}
+        if batcher is not None:
+            s["batches"] = batcher.batches
+            s["avg_batch_rows"] = round(batcher.rows / batcher.batches, 2) if batcher.batches else None
+        return s
+
+
+# ── HTTP ─────────────────────────────────────────────────────────────────────
+def _results(res):
+    out = res.to_dict(orient="records")
+    for r in out:
+        r['probability']  = float(r['probability'])
+        r['prediction']   = int(r['prediction'])
+        r['risk_factors'] = r['risk_factors'].split("; ") if r['risk_factors'] else []
+    return out
+
+
+class Handler(BaseHTTPRequestHandler):
+    server_version = "HeartRisk/1.0"
+    batcher = None
+    stats   = None
+    cache   = None
+    audit   = None
+
+    def _send(self, code, body, ctype="application/json"):
+        data = (body if isinstance(body, str) else json.dumps(body)).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, fmt, *args):
+        pass
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send(200, {"status": "ok",
+                             "model_version": getattr(self.batcher.current_model(), "version", None)})
+        elif self.path == "/stats":
+            self._send(200, dict(self.stats.snapshot(self.batcher),
+                                 prediction_cache=self.cache.stats(),
+                                 audit=self.audit.stats() if self.audit is not None else None))
+        elif self.path == "/metrics":
+            self._send(200, metrics.prometheus(), "text/plain; version=0.0.4")
+        elif self.path == "/metrics.json":
+            self._send(200, metrics.snapshot())
+        else:
+            self._send(404, {"error": "not found"})
+
+    # Cache miss for one patient: validate and score through the micro-batcher
+    # The model store's FastModel scores one patient in microseconds on the request
+    # thread (scoring.score_one); waiting for a micro-batch would only add latency.
+    # sklearn pipelines still go through the batcher, which amortizes their overhead.
+    def _score_one(self, record):
+        model = self.batcher.current_model()
+        if hasattr(model, "explain"):
+            r = scoring.score_one(record, model)
+            return prediction_cache.Prediction(r['probability'], r['prediction'], r['risk'],
+                                               tuple(r['risk_factors']))
+        X, errs = scoring.validate(scoring.to_frame(record), first_line=0, label="record")
+        if errs:
+            raise ValueError("; ".join(errs))
+        r = _results(self.batcher.submit(X))[0]
+        return prediction_cache.Prediction(r['probability'], r['prediction'], r['risk'],
+                                           tuple(r['risk_factors']))
+
+    def _predict_one(self, record):
+        try:
+            key = prediction_cache.feature_key(record)
+        except ValueError:
+            key = None                           # let validation produce the full message
+        if key is None:
+            p = self._score_one(record)
+        else:
+            version = prediction_cache.model_version(self.batcher.current_model())
+            p = self.cache.get_or_compute(version, key, lambda: self._score_one(record))
+        return dict(zip(OUT_COLS, p), risk_factors=list(p.risk_factors))
+
+    def do_POST(self):
+        if self.path != "/predict":
+            return self._send(404, {"error": "not found"})
+        with metrics.span("server.request"):
+            self._handle_predict()
+
+    def _handle_predict(self):
+        t0 = time.perf_counter()
+        try:
+            payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"null")
+            single  = isinstance(payload, dict) and "records" not in payload
+            records = payload["records"] if isinstance(payload, dict) and "records" in payload else payload
+            if not records or not isinstance(records, (dict, list)):
+                raise ValueError("expected a patient object, a list of them, or {\"records\": [...]}")
+            if single:
+                _check_types([records])
+            else:
+                bad = [i for i, r in enumerate(records) if not isinstance(r, dict)]
+                if bad:
+                    raise ValueError(f"records must be patient objects; not an object at index "
+                                     f"{', '.join(map(str, bad[:5]))}")
+                _check_types(records)
+                df = scoring.to_frame(records)
+                X, errs = scoring.validate(df, first_line=0, label="record")
+                if errs:
+                    raise ValueError("; ".join(errs))
+        except (ValueError, KeyError, TypeError) as e:
+            self.stats.error()
+            return self._send(400, {"error": str(e)})
+        try:
+            if single:
+                res = [self._predict_one(records)]
+            else:
+                out = self.batcher.submit(X)
+                res = _results(out)
+        except ValueError as e:                  # single record rejected on a cache miss
+            self.stats.error()
+            return self._send(400, {"error": str(e)})
+        except Exception as e:
+            self.stats.error()
+            return self._send(500, {"error": f"prediction failed: {e}"})
+        self.stats.add(time.perf_counter() - t0, len(res))
+        if self.audit is not None:                  # queued; written by the audit thread
+            version = getattr(self.batcher.current_model(), "version", None)
+            if single:
+                r = res[0]
+                self.audit.record(records, r['probability'], r['prediction'], r['risk'], version,
+                                  records.get(audit_log.REF), "server")
+            else:
+                self.audit.record_frame(X, out, version, df.get(audit_log.REF), "server")
+        if single:
+            self._send(200, res[0])
+        elif isinstance(payload, dict):
+            self._send(200, {"results": res})
+        else:
+            self._send(200, res)
+
+
+class Server(ThreadingHTTPServer):
+    daemon_threads     = True
+    request_queue_size = 256      # default backlog (5) resets bursts of concurrent clients
+
+
+def make_server(host="127.0.0.1", port=8000, model=None, max_batch=64, max_wait_ms=5.0, audit=None):
+    model = model if model is not None else model_store.registry()
+    handler = type("BoundHandler", (Handler,),
+                   {"batcher": MicroBatcher(model, max_batch, max_wait_ms), "stats": Stats(),
+                    "cache": prediction_cache.shared(), "audit": audit})
+    return Server((host, port), handler)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Local heart disease inference service")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8000)
+    ap.add_argument("--model", help="serve this joblib pipeline instead of the model store")
+    ap.add_argument("--max-batch", type=int, default=64, help="max rows per predict_proba call")
+    ap.add_argument("--max-wait-ms", type=float, default=5.0, help="max time to wait for a batch to fill")
+    ap.add_argument("--fast", action="store_true",
+                    help="with --model: score with the pure-NumPy fast path (the model store always does)")
+    ap.add_argument("--metrics", action="store_true", help="record per-stage timings for /metrics")
+    ap.add_argument("--audit", nargs="?", const=audit_log.DB_PATH, metavar="DB",
+                    help="append every prediction to this SQLite audit log (default: %(const)s)")
+    a = ap.parse_args(argv)
+
+    if a.metrics:
+        metrics.enable()
+
+    model = None
+    if a.model:
+        model = scoring.load_model(a.model)
+        if a.fast:
+            import fastpath
+            model = fastpath.FastModel.from_pipeline(model)
+    audit = audit_log.AuditLog(a.audit) if a.audit else None
+    srv = make_server(a.host, a.port, model, a.max_batch, a.max_wait_ms, audit)
+    print(f"Serving on http://{a.host}:{a.port}  (max_batch={a.max_batch}, max_wait={a.max_wait_ms}ms)")
+    try:
+        srv.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        srv.server_close()
+        if audit is not None:
+            audit.close()
+        print(json.dumps(srv.RequestHandlerClass.stats.snapshot(srv.RequestHandlerClass.batcher), indent=2))
+
+
+if __name__ == "__main__":
+    main()
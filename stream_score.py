@@ -0,0 +1,177 @@
+"""Score a patient CSV of any size in fixed-size chunks.
+
+The file is never loaded whole: each chunk is parsed with 32-bit columns,
+validated, narrowed to int8/int16/float32, scored in one vectorized call and
+appended to the output (CSV, or one Parquet row group per chunk). Peak memory
+follows --chunksize, not the file size. Extra columns (IDs, names) are read
+as text and passed through unchanged.
+
+Output is written to `<out>.part` and renamed on success, so a run that
+stops on invalid rows leaves no half-scored file behind.
+
+    python stream_score.py screening.csv scored.parquet --chunksize 200000
+    python stream_score.py screening.csv scored.csv --no-messages
+    python stream_score.py screening.csv scored.parquet --workers 16   # parallel_score.py
+    python stream_score.py screening.csv scored.csv --metrics timings.json   # per-stage histograms
+    python stream_score.py screening.csv scored.csv --contributions   # + contrib_<feature> columns
+"""
+import argparse
+import os
+import resource
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+import metrics
+import scoring
+from records import DTYPES          # narrow the written feature columns once scored
+from scoring import FEATURES
+
+# Parse dtype: read_csv wraps out-of-range values into narrow ints (300 -> 44
+# as int8), so parse as float32 (exact for these integers, keeps NaN) and
+# narrow only after the bounds check. oldpeak is parsed as float64: float32
+# would round 2.3 and shift its probability from what scoring.score gives.
+PARSE_DTYPE = {c: np.float64 if c == 'oldpeak' else np.float32 for c in FEATURES}
+
+
+# ── Reading ──────────────────────────────────────────────────────────────────
+def chunks(path, chunksize=100_000):
+    cols = pd.read_csv(path, nrows=0).columns
+    dtype = {c: PARSE_DTYPE.get(c, str) for c in cols}
+    line = 2
+    try:
+        for chunk in pd.read_csv(path, chunksize=chunksize, dtype=dtype, keep_default_na=False,
+                                 na_values={c: [""] for c in FEATURES}):
+            yield line, chunk
+            line += len(chunk)
+    except ValueError as e:
+        raise ValueError(f"CSV lines {line}–{line + chunksize - 1}: {e}")
+
+
+# Scored from validate()'s float64 frame, as scoring.score does, so a patient
+# gets the same probability from every entry point; only the written feature
+# columns are narrowed.
+def score_chunk(chunk, model, first_line=2, messages=True, contributions=False):
+    with metrics.span("stream.validate"):
+        X, errs = scoring.validate(chunk, first_line)
+    if errs:
+        raise ValueError("; ".join(errs))
+    out = scoring.score_frame(X, model, extra=chunk.drop(columns=FEATURES), messages=messages,
+                              contributions=contributions)
+    out[FEATURES] = out[FEATURES].astype(DTYPES)
+    return out
+
+
+# ── Writing ──────────────────────────────────────────────────────────────────
+class CsvSink:
+    def __init__(self, path):
+        self.f, self.first = open(path, "w", newline=""), True
+
+    def write(self, df):
+        df.to_csv(self.f, header=self.first, index=False)
+        self.first = False
+
+    def close(self):
+        self.f.close()
+
+
+class ParquetSink:
+    def __init__(self, path):
+        import pyarrow.parquet as pq
+        self.pq, self.path, self.writer = pq, path, None
+
+    def write(self, df):
+        import pyarrow as pa
+        if self.writer is None:
+            t = pa.Table.from_pandas(df, preserve_index=False)
+            self.writer = self.pq.ParquetWriter(self.path, t.schema)
+        else:
+            t = pa.Table.from_pandas(df, schema=self.writer.schema, preserve_index=False)
+        self.writer.write_table(t)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+# Format follows the final name; data goes to `part` until the run succeeds
+def sink_for(path, part):
+    return ParquetSink(part) if path.lower().endswith((".parquet", ".pq")) else CsvSink(part)
+
+
+# ── Run ──────────────────────────────────────────────────────────────────────
+def run(src, dst, model=None, chunksize=100_000, messages=True, progress=sys.stderr, contributions=False):
+    model = model if model is not None else scoring.get_model()   # one version for the whole file
+    part  = dst + ".part"
+    sink  = sink_for(dst, part)
+    rows, counts, t0 = 0, {"LOW": 0, "MEDIUM": 0, "HIGH": 0}, time.perf_counter()
+    try:
+        t = time.perf_counter()
+        for line, chunk in chunks(src, chunksize):
+            metrics.observe("stream.read", time.perf_counter() - t)
+            res = score_chunk(chunk, model, line, messages, contributions)
+            with metrics.span("stream.write"):
+                sink.write(res)
+            rows += len(res)
+            for k, v in res['risk'].value_counts().items():
+                counts[k] += int(v)
+            if progress:
+                dt = time.perf_counter() - t0
+                print(f"\r{rows:,} rows  {rows/dt:,.0f} rows/s", end="", file=progress, flush=True)
+            t = time.perf_counter()
+        sink.close()
+    except BaseException:
+        if progress and rows:
+            print(file=progress)
+        sink.close()
+        if os.path.exists(part):
+            os.remove(part)
+        raise
+    os.replace(part, dst)
+    if progress:
+        print(file=progress)
+    return {"rows": rows, "seconds": time.perf_counter() - t0, "risk": counts,
+            "model_version": getattr(model, "version", None)}
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Score a large patient CSV in chunks")
+    ap.add_argument("csv")
+    ap.add_argument("out", help="output .csv or .parquet")
+    ap.add_argument("--chunksize", type=int, default=100_000, help="rows per chunk (bounds memory)")
+    ap.add_argument("--no-messages", action="store_true", help="omit the risk_factors text column")
+    ap.add_argument("--model", help="joblib pipeline to use instead of the model store")
+    ap.add_argument("--workers", type=int, default=1, help="score each chunk across this many processes")
+    ap.add_argument("--contributions", action="store_true",
+                    help="add per-feature logit contributions (contrib_<feature> columns)")
+    ap.add_argument("--metrics", metavar="JSON", help="record per-stage timings and write them here")
+    a = ap.parse_args(argv)
+
+    if a.metrics:
+        metrics.enable()
+    model = scoring.load_model(a.model) if a.model else scoring.get_model()
+    if a.contributions and not hasattr(model, "explain"):
+        ap.error("--contributions needs the model store (a joblib --model has no explain)")
+    if a.workers > 1:
+        from parallel_score import ParallelScorer
+        model = ParallelScorer(model, a.workers)
+    try:
+        r = run(a.csv, a.out, model, a.chunksize, not a.no_messages, contributions=a.contributions)
+    except ValueError as e:
+        raise SystemExit(f"{a.csv}: {e}")
+    finally:
+        if a.workers > 1:
+            model.close()
+        if a.metrics:
+            metrics.dump(a.metrics)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"{r['rows']:,} rows in {r['seconds']:.1f}s — {r['rows']/max(r['seconds'], 1e-9):,.0f} rows/s  "
+          f"(model {r['model_version']}, peak RSS {peak:.0f} MiB)  "
+          f"LOW {r['risk']['LOW']:,} · MEDIUM {r['risk']['MEDIUM']:,} · HIGH {r['risk']['HIGH']:,}",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
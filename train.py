@@ -0,0 +1,180 @@
+"""Train the heart disease pipeline from heart.csv, reproducibly.
+
+heart.csv has 1025 rows but only 302 distinct patients; the duplicates are
+dropped first so cross-validation never scores a patient it trained on.
+The pipeline (scaler + one-hot + LogisticRegression) is tuned with a
+stratified k-fold grid search whose folds run in parallel (joblib n_jobs).
+The Pipeline's `memory` cache stores each fold's fitted preprocessing, so
+candidates that only differ in classifier settings reuse it instead of
+refitting.
+
+Every run gets a version (UTC start time + data sha256 prefix), stored on the
+pipeline as `metadata_` and in a metrics JSON beside it: CV mean/std per
+metric, the chosen parameters, data and model sha256, library versions and
+wall-clock times. The pipeline goes to runs/heart_disease_model-<version>.joblib
+unless `--out` names another path (written atomically), so a plain run never
+replaces the shipped heart_disease_model.joblib. Only `--publish` exports it
+to the model store (see model_store.py), which is what the app and service
+serve.
+
+    python train.py                                   # -> runs/heart_disease_model-<version>.joblib + .metrics.json
+    python train.py --jobs 8 --folds 10 --publish
+"""
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+import fastpath
+import model_store
+from model_store import _sha256, _write_atomic
+from scoring import FEATURES, MODEL_PATH
+
+DATA_PATH = os.path.join(os.path.dirname(MODEL_PATH), "heart.csv")
+RUNS_DIR  = os.path.join(os.path.dirname(MODEL_PATH), "runs")
+TARGET    = "target"
+NUMERIC   = ['age', 'trestbps', 'chol', 'thalach', 'oldpeak']
+CATEGORIC = ['sex', 'cp', 'fbs', 'restecg', 'exang', 'slope', 'ca', 'thal']
+GRID      = {"model__C": [0.01, 0.03, 0.1, 0.3, 1.0, 3.0, 10.0],
+             "model__class_weight": [None, "balanced"]}
+METRICS   = {"roc_auc": "roc_auc", "accuracy": "accuracy", "precision": "precision", "recall": "recall"}
+SEED      = 42
+
+
+def metrics_path(model_path):
+    return os.path.splitext(model_path)[0] + ".metrics.json"
+
+
+def run_path(version):
+    return os.path.join(RUNS_DIR, os.path.splitext(os.path.basename(MODEL_PATH))[0] + f"-{version}.joblib")
+
+
+# ── Data ─────────────────────────────────────────────────────────────────────
+def load_data(path=DATA_PATH):
+    raw = pd.read_csv(path)
+    missing = [c for c in FEATURES + [TARGET] if c not in raw.columns]
+    if missing:
+        raise ValueError(f"{path}: missing columns {missing}")
+    df = raw[FEATURES + [TARGET]].drop_duplicates(ignore_index=True)
+    return df[FEATURES], df[TARGET].to_numpy(), len(raw)
+
+
+# ── Model ────────────────────────────────────────────────────────────────────
+# Same structure as the shipped pipeline, which fastpath.export_arrays flattens
+def build_pipeline(memory=None):
+    from sklearn.compose import ColumnTransformer
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+    pre = ColumnTransformer([("num", StandardScaler(), NUMERIC),
+                             ("cat", OneHotEncoder(handle_unknown="ignore"), CATEGORIC)])
+    return Pipeline([("preprocess", pre), ("model", LogisticRegression(max_iter=5000))], memory=memory)
+
+
+def search(X, y, folds=5, jobs=-1, grid=GRID, cache_dir=None):
+    from sklearn.model_selection import GridSearchCV, StratifiedKFold
+
+    cv = StratifiedKFold(folds, shuffle=True, random_state=SEED)
+    gs = GridSearchCV(build_pipeline(cache_dir), grid, scoring=METRICS, refit="roc_auc",
+                      cv=cv, n_jobs=jobs, error_score="raise")
+    gs.fit(X, y)
+    return gs
+
+
+def summarize(gs):
+    i, r = gs.best_index_, gs.cv_results_
+    return {m: {"mean": float(r[f"mean_test_{m}"][i]), "std": float(r[f"std_test_{m}"][i])}
+            for m in METRICS}
+
+
+# Write-then-rename so the app never loads a half-written pipeline
+def _save(pipe, path):
+    import joblib
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), prefix=".tmp-")
+    os.close(fd)
+    try:
+        joblib.dump(pipe, tmp)
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except BaseException:
+        os.remove(tmp)
+        raise
+
+
+def train(data=DATA_PATH, out=None, folds=5, jobs=-1, publish=False):
+    import joblib
+    import sklearn
+
+    t0, started = time.perf_counter(), datetime.now(timezone.utc)
+    X, y, n_raw = load_data(data)
+    data_sha = _sha256(data)
+    version  = f"{started:%Y%m%dT%H%M%SZ}-{data_sha[:8]}"
+    out      = out or run_path(version)
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    t_load = time.perf_counter() - t0
+
+    cache_dir = tempfile.mkdtemp(prefix="heart-train-")
+    try:
+        t = time.perf_counter()
+        gs = search(X, y, folds, jobs, cache_dir=cache_dir)
+        t_search = time.perf_counter() - t
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+    pipe = gs.best_estimator_
+    pipe.set_params(memory=None)             # don't pickle a path to the deleted cache
+    pipe.metadata_ = {"version": version, "trained_at": started.isoformat(timespec="seconds"),
+                      "data_sha256": data_sha, "best_params": gs.best_params_,
+                      "cv_roc_auc": summarize(gs)["roc_auc"]["mean"]}
+    _save(pipe, out)
+
+    m = {"trained_at": pipe.metadata_["trained_at"],
+         "data": {"path": os.path.basename(data), "sha256": data_sha, "rows": n_raw,
+                  "unique": len(X), "duplicates_dropped": n_raw - len(X),
+                  "positive_rate": float(np.mean(y))},
+         "cv": {"folds": folds, "seed": SEED, "candidates": len(gs.cv_results_["params"]),
+                "refit": "roc_auc", "best_params": gs.best_params_, **summarize(gs)},
+         "model": {"path": os.path.basename(out), "sha256": _sha256(out), "version": version,
+                   "published": None},
+         "seconds": {"load": t_load, "search": t_search, "total": time.perf_counter() - t0},
+         "n_jobs": jobs, "versions": {"sklearn": sklearn.__version__, "joblib": joblib.__version__,
+                                      "numpy": np.__version__, "pandas": pd.__version__}}
+    if publish:
+        arr = fastpath.export_arrays(pipe)
+        fastpath.verify(fastpath.FastModel(arr), pipe, X)
+        m["model"]["published"] = model_store.publish(arr, source={"path": os.path.basename(out),
+                                                                 "sha256": m["model"]["sha256"]})
+    _write_atomic(metrics_path(out), json.dumps(m, indent=2) + "\n")
+    return pipe, m
+
+
+# ── CLI ──────────────────────────────────────────────────────────────────────
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Train and cross-validate the heart disease pipeline")
+    ap.add_argument("--data",  default=DATA_PATH)
+    ap.add_argument("--out",   help="joblib output (default: runs/heart_disease_model-<version>.joblib); "
+                                     "metrics go to <out>.metrics.json")
+    ap.add_argument("--folds", type=int, default=5)
+    ap.add_argument("--jobs",  type=int, default=-1, help="parallel CV fits (joblib n_jobs, -1 = all cores)")
+    ap.add_argument("--publish", action="store_true", help="also publish and activate it in the model store")
+    a = ap.parse_args(argv)
+
+    _, m = train(a.data, a.out, a.folds, a.jobs, a.publish)
+    d, cv, s = m["data"], m["cv"], m["seconds"]
+    print(f"{d['rows']} rows -> {d['unique']} unique patients ({d['duplicates_dropped']} duplicates dropped)")
+    print(f"best {cv['best_params']} over {cv['candidates']} candidates x {cv['folds']} folds")
+    print("  ".join(f"{k} {cv[k]['mean']:.3f}±{cv[k]['std']:.3f}" for k in METRICS))
+    out = a.out or run_path(m["model"]["version"])
+    print(f"run {m['model']['version']}: wrote {out} + {os.path.basename(metrics_path(out))}"
+          f"{'' if not m['model']['published'] else ', published ' + m['model']['published']}")
+    print(f"wall clock: search {s['search']:.2f}s, total {s['total']:.2f}s (n_jobs={a.jobs})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""What-if sweeps: risk over a grid of one or two features around one patient.
+
+Every other feature keeps the patient's value. The grid (up to 61 points
+for a curve, 41 x 41 patients for a heatmap) is built as one float64 matrix
+and scored with a single predict_proba call. Sweeps are cached per model
+version, patient and feature pair in a bounded LRU (a PredictionCache), so
+reopening the panel or redrawing the page doesn't rescore.
+
+    s = whatif.sweep(d, "chol", "trestbps")      # s.prob has shape (len(s.ys), len(s.xs))
+    whatif.figure(s, d, prob)                     # Plotly curve (one feature) or heatmap (two)
+"""
+import threading
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+import metrics
+import scoring
+from attribution import LABELS, UNITS
+from fastpath import FastModel
+from prediction_cache import PredictionCache, feature_key, model_version
+from scoring import BOUNDS, FEATURES, HIGH_T, LOW_T
+
+# Sweepable (continuous) features: default range and grid step
+RANGES = {'chol':(100, 400), 'trestbps':(90, 200), 'thalach':(70, 210),
+          'age':(29, 80), 'oldpeak':(0.0, 6.0)}
+STEPS  = {'chol':5, 'trestbps':2, 'thalach':2, 'age':1, 'oldpeak':0.1}
+POINTS = {1: 61, 2: 41}                 # grid points per axis for a curve / a heatmap
+
+Sweep = namedtuple("Sweep", "x xs y ys prob")
+
+_SHARED, _SHARED_LOCK = None, threading.Lock()
+
+
+def shared():
+    global _SHARED
+    if _SHARED is None:
+        with _SHARED_LOCK:
+            if _SHARED is None:
+                _SHARED = PredictionCache(max_entries=256)
+    return _SHARED
+
+
+# Evenly spaced (a whole multiple of STEPS) and at most n points over the default
+# range, widened to include the patient's own value and clipped to BOUNDS
+def axis(feature, value, n):
+    lo, hi = RANGES[feature]
+    lo, hi = max(min(lo, value), BOUNDS[feature][0]), min(max(hi, value), BOUNDS[feature][1])
+    step   = STEPS[feature] * max(1, int(np.ceil((hi - lo) / STEPS[feature] / (n - 1) - 1e-9)))
+    xs     = np.round(lo + step * np.arange(int((hi - lo) / step + 1e-9) + 1), 6)
+    return xs if xs[-1] >= hi else np.append(xs, hi)
+
+
+def _compute(d, x, y, model):
+    xs   = axis(x, float(d[x]), POINTS[1 if y is None else 2])
+    ys   = axis(y, float(d[y]), POINTS[2]) if y is not None else None
+    A    = np.tile(np.array(feature_key(d)), ((len(ys) if ys is not None else 1) * len(xs), 1))
+    A[:, FEATURES.index(x)] = np.tile(xs, len(A) // len(xs))
+    if ys is not None:
+        A[:, FEATURES.index(y)] = np.repeat(ys, len(xs))
+    with metrics.span("whatif.score"):
+        X    = A if isinstance(model, FastModel) else pd.DataFrame(A, columns=FEATURES)   # sklearn selects by name
+        prob = model.predict_proba(X)[:, 1]
+    prob = prob.reshape(len(ys), len(xs)) if ys is not None else prob
+    prob.flags.writeable = False            # shared through the cache
+    return Sweep(x, xs, y, ys, prob)
+
+
+def sweep(d, x, y=None, model=None, cache=None):
+    if x not in RANGES or (y is not None and y not in RANGES):
+        raise ValueError(f"what-if features must be among {', '.join(RANGES)}")
+    if x == y:
+        raise ValueError("pick two different features")
+    model = model if model is not None else scoring.get_model()
+    cache = cache if cache is not None else shared()
+    return cache.get_or_compute(model_version(model), (feature_key(d), x, y),
+                                lambda: _compute(d, x, y, model))
+
+
+# ── Figure ───────────────────────────────────────────────────────────────────
+def _title(f):
+    return f"{LABELS[f]}{' (' + UNITS[f].strip() + ')' if f in UNITS else ''}"
+
+
+def figure(s, d, prob=None, height=300):
+    import plotly.graph_objects as go
+    if s.y is None:
+        fig = go.Figure(go.Scatter(x=s.xs, y=s.prob * 100, mode="lines", line=dict(color="#C44569", width=3),
+                                   hovertemplate=f"{LABELS[s.x]} %{{x}}<br>Risk %{{y:.1f}}%<extra></extra>"))
+        for y0, y1, c in [(0, LOW_T, "39,174,96"), (LOW_T, HIGH_T, "243,156,18"), (HIGH_T, 1, "231,76,60")]:
+            fig.add_hrect(y0=y0 * 100, y1=y1 * 100, fillcolor=f"rgba({c},0.10)", line_width=0, layer="below")
+        if prob is not None:
+            fig.add_trace(go.Scatter(x=[d[s.x]], y=[prob * 100], mode="markers", name="Patient",
+                                     marker=dict(size=11, color="#222", symbol="diamond")))
+        fig.update_yaxes(title="Risk %", range=[0, 100])
+    else:
+        fig = go.Figure(go.Heatmap(x=s.xs, y=s.ys, z=s.prob * 100, zmin=0, zmax=100,
+                                   colorscale=[[0, "#27AE60"], [LOW_T, "#27AE60"], [0.5, "#F39C12"],
+                                               [HIGH_T, "#E74C3C"], [1, "#E74C3C"]],
+                                   colorbar=dict(title="Risk %", thickness=10),
+                                   hovertemplate=f"{LABELS[s.x]} %{{x}}<br>{LABELS[s.y]} %{{y}}"
+                                                 "<br>Risk %{z:.1f}%<extra></extra>"))
+        fig.add_trace(go.Scatter(x=[d[s.x]], y=[d[s.y]], mode="markers", name="Patient",
+                                 marker=dict(size=12, color="white", symbol="x", line=dict(width=2, color="#222"))))
+        fig.update_yaxes(title=_title(s.y))
+    fig.update_xaxes(title=_title(s.x))
+    fig.update_layout(height=height, margin=dict(l=10, r=10, t=10, b=10), showlegend=False,
+                      paper_bgcolor="rgba(0,0,0,0)")
+    return fig